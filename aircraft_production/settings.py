@@ -125,11 +125,40 @@ DATABASES = {
 }
 
 
+# Shared by every worker process, so cache versions bumped by one worker are seen by all.
+# Redis when REDIS_URL is set (docker-compose), otherwise a database table created by
+# "manage.py createcachetable" in entrypoint.sh. The table keeps one version and one payload
+# per assembly plus the report entries, MAX_ENTRIES must stay well above the number of assemblies
+REDIS_URL = os.environ.get('REDIS_URL')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'django_cache',
+            'OPTIONS': {
+                'MAX_ENTRIES': int(os.environ.get('CACHE_MAX_ENTRIES', 100000)),
+            },
+        }
+    }
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
 AUTH_USER_MODEL = 'accounts.User'
 
+# Session users are loaded together with their team
+AUTHENTICATION_BACKENDS = [
+    'apps.accounts.backends.TeamModelBackend',
+]
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -175,11 +204,17 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
-        'rest_framework.authtoken',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework.authentication.SessionAuthentication',
         'rest_framework.authentication.BasicAuthentication',
-        'rest_framework.authentication.TokenAuthentication',
+        'apps.accounts.authentication.TeamTokenAuthentication',
     ]
 }
+
+# Broker behind the assembly SSE stream (apps/assembly/events.py).
+# LocalBroker only reaches streams of the same process, PostgresBroker (LISTEN/NOTIFY) reaches every worker
+ASSEMBLY_EVENTS_BROKER = os.environ.get('ASSEMBLY_EVENTS_BROKER', 'apps.assembly.events.LocalBroker')
+
+# How long a POST sent with an Idempotency-Key header can be replayed (apps/parts/idempotency.py)
+IDEMPOTENCY_KEY_TTL = 60 * 60 * 24
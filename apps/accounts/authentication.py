@@ -0,0 +1,18 @@
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+
+class TeamTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication that fetches token, user and team with a single query"""
+
+    def authenticate_credentials(self, key):
+        try:
+            token = Token.objects.select_related('user__team').get(key=key)
+        except Token.DoesNotExist:
+            raise exceptions.AuthenticationFailed("Invalid token.")
+
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed("User inactive or deleted.")
+
+        return (token.user, token)
@@ -0,0 +1,91 @@
+import time
+from datetime import datetime
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+DASHBOARD_KEY = 'home-dashboard'
+VERSION_KEY = 'home-dashboard-version'
+LOCK_KEY = 'home-dashboard-lock'
+
+# Upper bound on staleness for changes made outside the invalidating code paths (admin, shell)
+DASHBOARD_TIMEOUT = 60 * 10
+# One worker recomputes at a time, the lock expires on its own if that worker dies
+LOCK_TIMEOUT = 10
+# How long a request waits for another worker to fill an empty cache before computing itself
+WAIT_TIMEOUT = 2
+WAIT_STEP = 0.05
+
+
+def invalidate_dashboard():
+    """Mark the cached numbers stale once the current transaction commits"""
+    transaction.on_commit(lambda: cache.set(VERSION_KEY, time.time_ns(), None))
+
+
+def compute_dashboard():
+    """
+    Every number of the home page, one conditional aggregate per table:
+    assembly statuses, available parts per type from the stock ledger and today's aircraft
+    """
+    # Import here to avoid circular import
+    from apps.assembly.models import AssemblyProcess
+    from apps.parts.models import StockLevel, PART_TYPES
+    from apps.planes.models import Aircraft
+
+    data = AssemblyProcess.objects.aggregate(
+        in_progress_count=Count('id', filter=Q(status='in_progress')),
+        completed_count=Count('id', filter=Q(status='completed')),
+        cancelled_count=Count('id', filter=Q(status='cancelled')),
+    )
+
+    available = StockLevel.objects.aggregate(**{
+        part_type: Coalesce(Sum('available', filter=Q(part_type=part_type)), 0)
+        for part_type, _ in PART_TYPES
+    })
+    data['available_parts'] = [
+        {'part_type': part_type, 'name': name, 'count': available[part_type]}
+        for part_type, name in PART_TYPES
+    ]
+
+    today = timezone.localdate()
+    # A range on the raw column, so the assembled_at index is usable
+    start = timezone.make_aware(datetime.combine(today, datetime.min.time()))
+    data['delivered_today'] = Aircraft.objects.filter(assembled_at__gte=start).count()
+    data['date'] = today
+    return data
+
+
+def get_dashboard():
+    """
+    Cached dashboard numbers with stampede protection.
+    A stale or missing entry is recomputed by the one request that takes the lock, the others
+    keep serving the stale entry, or wait for the fresh one when there is nothing cached yet
+    """
+    cached = cache.get_many([DASHBOARD_KEY, VERSION_KEY])
+    entry = cached.get(DASHBOARD_KEY)
+    version = cached.get(VERSION_KEY)
+    if entry is not None and entry['version'] == version and entry['data']['date'] == timezone.localdate():
+        return entry['data']
+
+    if cache.add(LOCK_KEY, True, LOCK_TIMEOUT):
+        try:
+            data = compute_dashboard()
+            # Stored under the version read before computing, a change made meanwhile leaves it stale
+            cache.set(DASHBOARD_KEY, {'version': version, 'data': data}, DASHBOARD_TIMEOUT)
+        finally:
+            cache.delete(LOCK_KEY)
+        return data
+
+    if entry is not None:
+        return entry['data']
+
+    deadline = time.monotonic() + WAIT_TIMEOUT
+    while time.monotonic() < deadline:
+        time.sleep(WAIT_STEP)
+        entry = cache.get(DASHBOARD_KEY)
+        if entry is not None:
+            return entry['data']
+    return compute_dashboard()
@@ -27,15 +27,24 @@ class Team(models.Model):
     def __str__(self):
         return self.name
     
+    """Assembly teams assemble aircraft and don't produce parts"""
+    @property
+    def is_assembly(self):
+        return self.team_type == 'assembly'
+    
+    """The part type this team produces, None for the assembly team"""
+    @property
+    def produced_part_type(self):
+        return TEAM_TO_PART_TYPE.get(self.team_type)
+    
     """Check if team can produce this type of part"""
     def can_produce_part(self, part_type):
         # Assembly team can't produce parts
-        if self.team_type == 'assembly':
+        if self.is_assembly:
             return False
             
         # Teams can only produce parts matching their type
-        allowed_part_type = TEAM_TO_PART_TYPE.get(self.team_type)
-        return allowed_part_type == part_type
+        return self.produced_part_type == part_type
 
 class User(AbstractUser):
     team = models.ForeignKey(Team, on_delete=models.SET_NULL, null=True, blank=True)
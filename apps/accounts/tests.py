@@ -1,8 +1,17 @@
+from django.core.cache import cache
 from django.test import TestCase, Client
 from django.urls import reverse
 from apps.accounts.models import User, Team
 from rest_framework.test import APITestCase
 from rest_framework import status
+from rest_framework.authtoken.models import Token
+from apps.accounts.backends import TeamModelBackend
+from apps.accounts.authentication import TeamTokenAuthentication
+from apps.parts.models import Part
+from apps.parts.permissions import CanManagePart
+from apps.parts.stock import move_stock
+from apps.planes.models import Aircraft
+from apps.accounts.dashboard import LOCK_KEY, get_dashboard
 
 # Create your tests here.
 
@@ -116,3 +125,105 @@ class UserAPITests(TestCase):
         
         # Check successful login response
         self.assertEqual(response.status_code, 302)  # Redirect after login
+
+
+
+class TeamLoadingTests(TestCase):
+    """Tests that authentication loads the team so permission checks cost no queries"""
+    
+    def setUp(self):
+        self.team = Team.objects.create(name='Wing Team', team_type='wing')
+        self.user = User.objects.create_user(
+            username='wing_user',
+            email='wing@example.com',
+            password='password',
+            team=self.team
+        )
+        self.part = Part.objects.create(part_type='wing', aircraft_type='TB2', team=self.team, creator=self.user)
+    
+    """Test session users come with their team"""
+    def test_backend_loads_team(self):
+        user = TeamModelBackend().get_user(self.user.id)
+        with self.assertNumQueries(0):
+            self.assertTrue(user.team.can_produce_part('wing'))
+    
+    """Test token users come with their team"""
+    def test_token_authentication_loads_team(self):
+        token = Token.objects.create(user=self.user)
+        user, _ = TeamTokenAuthentication().authenticate_credentials(token.key)
+        with self.assertNumQueries(0):
+            self.assertEqual(user.team.produced_part_type, 'wing')
+    
+    """Test part permission checks compare team ids without queries"""
+    def test_part_permission_without_queries(self):
+        user = TeamModelBackend().get_user(self.user.id)
+        part = Part.objects.get(id=self.part.id)
+        
+        class MockRequest:
+            method = 'DELETE'
+            def __init__(self, user):
+                self.user = user
+        
+        class MockView:
+            action = 'destroy'
+        
+        permission = CanManagePart()
+        request = MockRequest(user)
+        with self.assertNumQueries(0):
+            self.assertTrue(permission.has_permission(request, MockView()))
+            self.assertTrue(permission.has_object_permission(request, MockView(), part))
+
+
+class HomeDashboardTests(TestCase):
+    """Tests for the cached home page numbers"""
+    
+    def setUp(self):
+        self.client = Client()
+        self.team = Team.objects.create(name='Wing Team', team_type='wing')
+        self.user = User.objects.create_user(username='wing_user', password='password', team=self.team)
+    
+    def create_part(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            part = Part.objects.create(part_type='wing', aircraft_type='TB2', team=self.team, creator=self.user)
+            move_stock([part], to_state='available')
+        return part
+    
+    def available_wings(self, data):
+        return next(row['count'] for row in data['available_parts'] if row['part_type'] == 'wing')
+    
+    """Test the numbers are cached until a part changes"""
+    def test_dashboard_cached_and_invalidated(self):
+        self.create_part()
+        Aircraft.objects.create(aircraft_type='TB2')
+        
+        data = get_dashboard()
+        self.assertEqual(self.available_wings(data), 1)
+        self.assertEqual(data['delivered_today'], 1)
+        self.assertEqual(data['in_progress_count'], 0)
+        
+        # A cache hit is one cache read
+        with self.assertNumQueries(1):
+            get_dashboard()
+        
+        self.create_part()
+        self.assertEqual(self.available_wings(get_dashboard()), 2)
+    
+    """Test a stale entry is served while another request holds the recompute lock"""
+    def test_stale_entry_served_during_refresh(self):
+        self.create_part()
+        get_dashboard()
+        self.create_part()
+        
+        cache.add(LOCK_KEY, True, 10)
+        self.assertEqual(self.available_wings(get_dashboard()), 1)
+        
+        cache.delete(LOCK_KEY)
+        self.assertEqual(self.available_wings(get_dashboard()), 2)
+    
+    """Test the home page renders the dashboard numbers"""
+    def test_home_page(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('home'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('delivered_today', response.context)
+        self.assertIn('cancelled_count', response.context)
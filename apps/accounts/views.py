@@ -12,6 +12,7 @@ from .decorators import admin_required
 from django.http import JsonResponse
 from django.template.loader import render_to_string
 from .models import Team
+from .dashboard import get_dashboard
 
 User = get_user_model()
 
@@ -20,14 +21,10 @@ User = get_user_model()
 def home(request):
     last_login = request.user.last_login
     
-    from apps.assembly.models import AssemblyProcess
-    completed_count = AssemblyProcess.objects.filter(status='completed').count()
-    in_progress_count = AssemblyProcess.objects.filter(status='in_progress').count()
-    
+    # Shared by every user, computed once and cached until assemblies or parts change
     context = {
         'last_login': last_login,
-        'completed_count': completed_count,
-        'in_progress_count': in_progress_count,
+        **get_dashboard(),
     }
     
     return render(request, 'home.html', context)
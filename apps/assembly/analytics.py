@@ -0,0 +1,84 @@
+from datetime import datetime, time, timedelta
+
+from django.core.cache import cache
+from django.db.models import Avg, Count, DateField, DurationField, ExpressionWrapper, F, Max, Min
+from django.db.models.functions import TruncDate, TruncWeek
+from django.utils import timezone
+
+from apps.assembly.models import AssemblyProcess
+from apps.parts.models import Part
+from apps.planes.models import Aircraft
+
+# Reports are aggregated in the database and only cached briefly, new production shows up within a minute
+REPORT_TIMEOUT = 60
+
+PERIODS = {
+    'day': lambda field: TruncDate(field),
+    'week': lambda field: TruncWeek(field, output_field=DateField()),
+}
+
+
+def get_bounds(date_from, date_to):
+    """Aware [start, end) datetimes covering whole local days from date_from to date_to"""
+    start = timezone.make_aware(datetime.combine(date_from, time.min))
+    end = timezone.make_aware(datetime.combine(date_to + timedelta(days=1), time.min))
+    return start, end
+
+
+def aircraft_throughput(period, start, end):
+    """Aircraft completed per period and aircraft type"""
+    return Aircraft.objects.filter(assembled_at__gte=start, assembled_at__lt=end).annotate(
+        period=PERIODS[period]('assembled_at'),
+    ).values('period', 'aircraft_type').annotate(count=Count('id')).order_by('period', 'aircraft_type')
+
+
+def parts_production(period, start, end):
+    """Parts produced per period, team and part type"""
+    return Part.objects.filter(created_at__gte=start, created_at__lt=end).annotate(
+        period=PERIODS[period]('created_at'),
+        team_name=F('team__name'),
+    ).values('period', 'team_id', 'team_name', 'part_type').annotate(
+        count=Count('id'),
+    ).order_by('period', 'team_name', 'part_type')
+
+
+def assembly_lead_time(period, start, end):
+    """Start-to-completion time of completed assemblies per period (of completion) and aircraft type"""
+    lead_time = ExpressionWrapper(F('completion_date') - F('start_date'), output_field=DurationField())
+    rows = AssemblyProcess.objects.filter(
+        status='completed', completion_date__gte=start, completion_date__lt=end
+    ).annotate(
+        period=PERIODS[period]('completion_date'),
+    ).values('period', 'aircraft_type').annotate(
+        count=Count('id'),
+        average=Avg(lead_time),
+        shortest=Min(lead_time),
+        longest=Max(lead_time),
+    ).order_by('period', 'aircraft_type')
+
+    return [{
+        'period': row['period'],
+        'aircraft_type': row['aircraft_type'],
+        'count': row['count'],
+        'average_seconds': round(row['average'].total_seconds()),
+        'shortest_seconds': round(row['shortest'].total_seconds()),
+        'longest_seconds': round(row['longest'].total_seconds()),
+    } for row in rows]
+
+
+REPORTS = {
+    'aircraft': aircraft_throughput,
+    'parts': parts_production,
+    'lead-time': assembly_lead_time,
+}
+
+
+def get_report(name, period, date_from, date_to):
+    """One report as a list of rows, from the cache when the same range was asked for recently"""
+    key = f'analytics:{name}:{period}:{date_from.isoformat()}:{date_to.isoformat()}'
+    rows = cache.get(key)
+    if rows is None:
+        start, end = get_bounds(date_from, date_to)
+        rows = list(REPORTS[name](period, start, end))
+        cache.set(key, rows, REPORT_TIMEOUT)
+    return rows
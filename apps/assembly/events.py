@@ -0,0 +1,160 @@
+import asyncio
+import json
+import logging
+import select
+import threading
+import time
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+# Every assembly page listens here for parts entering and leaving the shelf
+INVENTORY_CHANNEL = 'inventory'
+
+
+def assembly_channel(assembly_id):
+    return f'assembly.{assembly_id}'
+
+
+class LocalBroker:
+    """
+    In-process fan-out, each subscriber owns an asyncio queue on its event loop.
+    Only reaches streams served by the same worker process
+    """
+    queue_size = 100
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscribers = {}
+
+    def publish(self, channel, message):
+        self.deliver(channel, message)
+
+    """Hand a message to every local subscriber of the channel, safe to call from any thread"""
+    def deliver(self, channel, message):
+        with self.lock:
+            targets = list(self.subscribers.get(channel, ()))
+        for loop, queue in targets:
+            try:
+                loop.call_soon_threadsafe(self.enqueue, queue, message)
+            except RuntimeError:
+                # The subscriber's loop is gone, its stream will unsubscribe on the way out
+                pass
+
+    @staticmethod
+    def enqueue(queue, message):
+        # A client that stopped reading loses its oldest events instead of growing the queue
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(message)
+
+    """Must be called from the event loop that will read the returned queue"""
+    def subscribe(self, channels):
+        queue = asyncio.Queue(self.queue_size)
+        entry = (asyncio.get_running_loop(), queue)
+        with self.lock:
+            for channel in channels:
+                self.subscribers.setdefault(channel, set()).add(entry)
+        return queue
+
+    def unsubscribe(self, channels, queue):
+        with self.lock:
+            for channel in channels:
+                entries = self.subscribers.get(channel, set())
+                entries.difference_update({entry for entry in entries if entry[1] is queue})
+                if not entries:
+                    self.subscribers.pop(channel, None)
+
+
+class PostgresBroker(LocalBroker):
+    """
+    Broker for several worker processes on PostgreSQL LISTEN/NOTIFY.
+    publish() sends a NOTIFY on the default connection, one listener thread per process
+    receives every notification and fans it out to the local subscribers
+    """
+    pg_channel = 'assembly_events'
+    poll_timeout = 30
+    reconnect_delay = 2
+
+    def __init__(self):
+        super().__init__()
+        self.listener = None
+
+    def publish(self, channel, message):
+        payload = json.dumps({'channel': channel, 'message': message})
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_notify(%s, %s)', [self.pg_channel, payload])
+
+    def subscribe(self, channels):
+        self.start_listener()
+        return super().subscribe(channels)
+
+    def start_listener(self):
+        with self.lock:
+            if self.listener is not None and self.listener.is_alive():
+                return
+            self.listener = threading.Thread(target=self.listen, name='assembly-events', daemon=True)
+            self.listener.start()
+
+    def listen(self):
+        import psycopg2
+        from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+
+        while True:
+            conn = None
+            try:
+                conn = psycopg2.connect(**connection.get_connection_params())
+                conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+                with conn.cursor() as cursor:
+                    cursor.execute(f'LISTEN {self.pg_channel}')
+
+                while True:
+                    if select.select([conn], [], [], self.poll_timeout) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        notify = conn.notifies.pop(0)
+                        data = json.loads(notify.payload)
+                        self.deliver(data['channel'], data['message'])
+            except Exception:
+                # Anything (a dropped connection, a malformed payload) only costs a reconnect,
+                # the thread must outlive it or every stream of this process goes silent
+                logger.exception("Assembly event listener failed, reconnecting")
+                time.sleep(self.reconnect_delay)
+            finally:
+                if conn is not None:
+                    conn.close()
+
+
+@lru_cache(maxsize=None)
+def get_broker():
+    return import_string(settings.ASSEMBLY_EVENTS_BROKER)()
+
+
+def publish(channel, event, data):
+    """Send an event once the surrounding transaction commits, rolled back changes are never announced"""
+    message = {'event': event, 'data': data}
+    transaction.on_commit(lambda: get_broker().publish(channel, message))
+
+
+def publish_assembly_event(assembly, event, **data):
+    publish(assembly_channel(assembly.id), event, {'assembly_id': assembly.id, **data})
+
+
+def publish_inventory_event(event, aircraft_type, parts):
+    publish(INVENTORY_CHANNEL, event, {
+        'aircraft_type': aircraft_type,
+        'part_ids': [part.id for part in parts],
+    })
+
+
+def part_payload(part):
+    return {
+        'id': part.id,
+        'part_type': part.part_type,
+        'part_type_display': part.get_part_type_display(),
+    }
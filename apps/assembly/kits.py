@@ -0,0 +1,72 @@
+from django.utils import timezone
+
+from apps.assembly.events import publish_inventory_event
+from apps.assembly.models import AssemblyProcess, AssemblyPart, AssemblyLog
+from apps.parts.models import Part, PART_TYPES
+from apps.parts.stock import move_stock
+
+
+def reserve_parts(aircraft_type, part_type, count):
+    """
+    Lock the `count` oldest available parts of one type.
+    SKIP LOCKED passes over rows another allocation holds, so concurrent workers
+    split the shelf between them instead of queueing on the same parts
+    """
+    return list(
+        Part.objects.available()
+            .select_for_update(skip_locked=True, of=('self',))
+            .filter(aircraft_type=aircraft_type, part_type=part_type)
+            .order_by('created_at', 'id')[:count]
+    )
+
+
+def allocate_kits(aircraft_type, count, user):
+    """
+    Start up to `count` assemblies of `aircraft_type`, each with one part of every type, oldest parts first.
+    Must run inside a transaction. Returns (assemblies, available) where available maps part types to
+    how many parts could be reserved, so callers can report what is short.
+    Part selection never waits on another allocation, but every allocation of the same aircraft type
+    updates the same StockLevel rows, so concurrent allocations queue on those for the rest of the
+    transaction. The ledger is therefore updated last, right before the caller commits
+    """
+    reserved = {part_type: reserve_parts(aircraft_type, part_type, count) for part_type, _ in PART_TYPES}
+    available = {part_type: len(parts) for part_type, parts in reserved.items()}
+    kits = min(available.values())
+    if not kits:
+        return [], available
+
+    assemblies = AssemblyProcess.objects.bulk_create([
+        AssemblyProcess(aircraft_type=aircraft_type, started_by=user)
+        for _ in range(kits)
+    ])
+
+    assembly_parts = []
+    logs = []
+    for index, assembly in enumerate(assemblies):
+        logs.append(AssemblyLog(
+            assembly=assembly,
+            action_by=user,
+            action='started'
+        ))
+        for part_type, _ in PART_TYPES:
+            part = reserved[part_type][index]
+            assembly_parts.append(AssemblyPart(assembly=assembly, part=part, added_by=user))
+            logs.append(AssemblyLog(
+                assembly=assembly,
+                action_by=user,
+                action='added_part',
+                part=part,
+                notes=f"Eklenen parça: {part.get_part_type_display()}"
+            ))
+
+    AssemblyPart.objects.bulk_create(assembly_parts)
+    AssemblyLog.objects.bulk_create(logs)
+
+    parts = [assembly_part.part for assembly_part in assembly_parts]
+    # The parts' in-use flag changed, let conditional GETs see it
+    Part.objects.filter(pk__in=[part.pk for part in parts]).update(updated_at=timezone.now())
+    publish_inventory_event('parts_reserved', aircraft_type, parts)
+    # Last statement of the transaction: the shared ledger rows stay locked only until the commit
+    move_stock(parts, 'available', 'in_assembly')
+
+    return assemblies, available
@@ -0,0 +1,71 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from apps.assembly.models import AssemblyProcess, AssemblyLog, AssemblyLogArchive
+
+ARCHIVE_FIELDS = ['id', 'assembly_id', 'action_by_id', 'timestamp', 'action', 'part_id', 'notes']
+
+
+class Command(BaseCommand):
+    help = "Move the logs of completed/cancelled assemblies older than the retention window to the archive table"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=180,
+            help="Archive assemblies finished more than this many days ago (default: 180)",
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=200,
+            help="Assemblies moved per transaction (default: 200)",
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help="Only report how many assemblies and log rows would be moved",
+        )
+
+    def handle(self, *args, **options):
+        if options['days'] < 0 or options['batch_size'] <= 0:
+            raise CommandError("--days must be zero or more and --batch-size must be positive.")
+
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        assembly_ids = list(
+            AssemblyProcess.objects.filter(
+                status__in=['completed', 'cancelled'],
+                completion_date__lt=cutoff,
+                logs_archived=False,
+            ).order_by('id').values_list('id', flat=True)
+        )
+
+        if options['dry_run']:
+            rows = AssemblyLog.objects.filter(assembly_id__in=assembly_ids).count()
+            self.stdout.write(f"Would archive {rows} log row(s) of {len(assembly_ids)} assembly process(es).")
+            return
+
+        moved = 0
+        batch_size = options['batch_size']
+        for start in range(0, len(assembly_ids), batch_size):
+            moved += self.archive_batch(assembly_ids[start:start + batch_size])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Archived {moved} log row(s) of {len(assembly_ids)} assembly process(es)."
+        ))
+
+    """Copy, delete and flag one batch of assemblies in a single transaction"""
+    def archive_batch(self, assembly_ids):
+        with transaction.atomic():
+            logs = AssemblyLog.objects.filter(assembly_id__in=assembly_ids)
+            archived = AssemblyLogArchive.objects.bulk_create(
+                [AssemblyLogArchive(**row) for row in logs.values(*ARCHIVE_FIELDS).iterator()],
+                batch_size=1000,
+            )
+            logs.delete()
+            AssemblyProcess.objects.filter(id__in=assembly_ids).update(logs_archived=True)
+        return len(archived)
@@ -0,0 +1,57 @@
+# Generated by Django 5.2 on 2026-10-18 04:22
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('parts', '0001_initial'),
+        ('planes', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AssemblyProcess',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('aircraft_type', models.CharField(choices=[('TB2', 'TB2'), ('TB3', 'TB3'), ('AKINCI', 'AKINCI'), ('KIZILELMA', 'KIZILELMA')], max_length=50)),
+                ('start_date', models.DateTimeField(auto_now_add=True)),
+                ('completion_date', models.DateTimeField(blank=True, null=True)),
+                ('status', models.CharField(choices=[('in_progress', 'Devam Ediyor'), ('completed', 'Tamamlandı'), ('cancelled', 'İptal Edildi')], default='in_progress', max_length=20)),
+                ('aircraft', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='assembly_process', to='planes.aircraft')),
+                ('completed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='completed_assemblies', to=settings.AUTH_USER_MODEL)),
+                ('started_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='started_assemblies', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='AssemblyLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('timestamp', models.DateTimeField(auto_now_add=True)),
+                ('action', models.CharField(choices=[('started', 'Montaj Başlatıldı'), ('added_part', 'Parça Eklendi'), ('removed_part', 'Parça Çıkarıldı'), ('completed', 'Montaj Tamamlandı'), ('cancelled', 'Montaj İptal Edildi')], max_length=20)),
+                ('notes', models.TextField(blank=True, null=True)),
+                ('action_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+                ('part', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='parts.part')),
+                ('assembly', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='assembly.assemblyprocess')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='AssemblyPart',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('added_at', models.DateTimeField(auto_now_add=True)),
+                ('added_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+                ('part', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, to='parts.part')),
+                ('assembly', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='assembly.assemblyprocess')),
+            ],
+            options={
+                'unique_together': {('assembly', 'part')},
+            },
+        ),
+    ]
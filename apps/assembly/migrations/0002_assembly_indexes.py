@@ -0,0 +1,25 @@
+# Generated by Django 5.2 on 2026-10-18 04:22
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assembly', '0001_initial'),
+        ('parts', '0001_initial'),
+        ('planes', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='assemblylog',
+            index=models.Index(fields=['assembly', 'timestamp'], name='assemblylog_assembly_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='assemblyprocess',
+            index=models.Index(fields=['status', 'start_date'], name='assembly_status_start_idx'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2 on 2026-10-18 04:43
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assembly', '0003_assemblyprocess_updated_at'),
+        ('parts', '0004_part_updated_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='assemblyprocess',
+            name='logs_archived',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.CreateModel(
+            name='AssemblyLogArchive',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('timestamp', models.DateTimeField()),
+                ('action', models.CharField(choices=[('started', 'Montaj Başlatıldı'), ('added_part', 'Parça Eklendi'), ('removed_part', 'Parça Çıkarıldı'), ('completed', 'Montaj Tamamlandı'), ('cancelled', 'Montaj İptal Edildi')], max_length=20)),
+                ('notes', models.TextField(blank=True, null=True)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('action_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('assembly', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='assembly.assemblyprocess')),
+                ('part', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='parts.part')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['assembly', 'timestamp'], name='logarchive_assembly_ts_idx')],
+            },
+        ),
+    ]
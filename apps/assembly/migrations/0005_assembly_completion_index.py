@@ -0,0 +1,20 @@
+# Generated by Django 5.2 on 2026-10-18 05:02
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assembly', '0004_assemblylogarchive'),
+        ('planes', '0003_aircraft_assembled_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='assemblyprocess',
+            index=models.Index(fields=['status', 'completion_date'], name='assembly_status_done_idx'),
+        ),
+    ]
@@ -21,8 +21,20 @@ class AssemblyProcess(models.Model):
     completed_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='completed_assemblies')
     start_date = models.DateTimeField(auto_now_add=True)
     completion_date = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='in_progress')
     aircraft = models.OneToOneField(Aircraft, on_delete=models.SET_NULL, null=True, blank=True, related_name='assembly_process')
+    # Set once archive_assembly_logs has moved this assembly's history to AssemblyLogArchive
+    logs_archived = models.BooleanField(default=False)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'start_date'], name='assembly_status_start_idx'),
+            # Lead time analytics read completed assemblies by completion date
+            models.Index(fields=['status', 'completion_date'], name='assembly_status_done_idx'),
+            # Aircraft type filters and the search box match the type exactly, newest first
+            models.Index(fields=['aircraft_type', 'start_date'], name='assembly_type_start_idx'),
+        ]
     
     def __str__(self):
         return f"Assembly of {self.aircraft_type} - {self.id} ({self.get_status_display()})"
@@ -38,7 +50,11 @@ class AssemblyProcess(models.Model):
     
     """Returns a list of part types that are missing from this assembly"""
     def get_missing_parts(self):
-        assigned_part_types = self.assemblypart_set.values_list('part__part_type', flat=True)
+        # Reuse prefetched assembly parts (detail payload) instead of querying again
+        if 'assemblypart_set' in getattr(self, '_prefetched_objects_cache', {}):
+            assigned_part_types = [assembly_part.part.part_type for assembly_part in self.assemblypart_set.all()]
+        else:
+            assigned_part_types = self.assemblypart_set.values_list('part__part_type', flat=True)
         all_part_types = ['wing', 'body', 'tail', 'avionics']
         return [pt for pt in all_part_types if pt not in assigned_part_types]
 
@@ -76,5 +92,33 @@ class AssemblyLog(models.Model):
     part = models.ForeignKey(Part, on_delete=models.SET_NULL, null=True, blank=True)
     notes = models.TextField(blank=True, null=True)
     
+    class Meta:
+        indexes = [
+            models.Index(fields=['assembly', 'timestamp'], name='assemblylog_assembly_ts_idx'),
+        ]
+    
     def __str__(self):
         return f"{self.get_action_display()} - {self.assembly}"
+
+
+"""
+    Logs of finished assemblies moved out of AssemblyLog by the archive_assembly_logs command.
+    Rows keep their original id, so a history reads the same before and after archiving
+"""
+class AssemblyLogArchive(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    assembly = models.ForeignKey(AssemblyProcess, on_delete=models.CASCADE)
+    action_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='+')
+    timestamp = models.DateTimeField()
+    action = models.CharField(max_length=20, choices=AssemblyLog.ACTION_CHOICES)
+    part = models.ForeignKey(Part, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    notes = models.TextField(blank=True, null=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['assembly', 'timestamp'], name='logarchive_assembly_ts_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.get_action_display()} - {self.assembly} (archived)"
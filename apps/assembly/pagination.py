@@ -0,0 +1,29 @@
+from apps.parts.pagination import KeysetPagination, PartPagination
+
+
+class AssemblyKeysetPagination(KeysetPagination):
+    """Keyset pagination on (start_date, id) for assembly processes"""
+    keyset_field = 'start_date'
+
+
+class AssemblyPagination(PartPagination):
+    """Same request-driven modes as the part list, requests without paging parameters get the first keyset page"""
+    keyset_pagination_class = AssemblyKeysetPagination
+    allow_unpaginated = False
+
+
+class AircraftKeysetPagination(KeysetPagination):
+    """Keyset pagination on (assembled_at, id) for completed aircraft"""
+    keyset_field = 'assembled_at'
+
+
+class AircraftPagination(PartPagination):
+    """DataTables or keyset completed aircraft list, requests without paging parameters get the first keyset page"""
+    keyset_pagination_class = AircraftKeysetPagination
+    allow_unpaginated = False
+
+
+class AssemblyLogPagination(KeysetPagination):
+    """Newest log entries first, served by the (assembly, timestamp) index"""
+    keyset_field = 'timestamp'
+    page_size = 20
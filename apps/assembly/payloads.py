@@ -0,0 +1,91 @@
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Prefetch
+
+from apps.assembly.models import AssemblyProcess, AssemblyPart
+from apps.assembly.serializers import AssemblyProcessSerializer
+
+# Finished assemblies can't change through the API anymore, in-progress ones expire sooner
+# in case they are edited outside the versioned code paths (admin, shell)
+FINISHED_TIMEOUT = 60 * 60 * 24
+IN_PROGRESS_TIMEOUT = 60 * 5
+
+
+def version_key(assembly_id):
+    return f'assembly-detail-version:{assembly_id}'
+
+
+def payload_key(assembly_id, version):
+    return f'assembly-detail:{assembly_id}:{version}'
+
+
+def get_version(assembly_id):
+    key = version_key(assembly_id)
+    version = cache.get(key)
+    if version is None:
+        # add() only writes when the key is missing, so concurrent first readers agree on the version
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(assembly_id):
+    """
+    Invalidate every cached payload of the assembly once the current transaction commits.
+    A new timestamp (not a counter) can't collide with an old payload if the version key was evicted
+    """
+    transaction.on_commit(lambda: cache.set(version_key(assembly_id), time.time_ns(), None))
+
+
+def detail_queryset():
+    return AssemblyProcess.objects.select_related('started_by', 'completed_by').prefetch_related(
+        Prefetch(
+            'assemblypart_set',
+            queryset=AssemblyPart.objects.select_related('part__creator', 'part__team', 'added_by')
+        )
+    )
+
+
+def build_assembly_payload(assembly):
+    """Detail payload shared by the API and the detail page, `assembly` should come from detail_queryset()"""
+    data = AssemblyProcessSerializer(assembly).data
+
+    # Add explicit display values
+    data['get_status_display'] = assembly.get_status_display()
+    data['get_aircraft_type_display'] = assembly.get_aircraft_type_display()
+
+    # Add user information
+    if assembly.started_by:
+        data['started_by'] = {
+            'username': assembly.started_by.username,
+            'id': assembly.started_by.id
+        }
+
+    if assembly.completed_by:
+        data['completed_by'] = {
+            'username': assembly.completed_by.username,
+            'id': assembly.completed_by.id
+        }
+
+    # Format dates
+    if assembly.start_date:
+        data['start_date'] = assembly.start_date.strftime('%d.%m.%Y %H:%M')
+
+    if assembly.completion_date:
+        data['completion_date'] = assembly.completion_date.strftime('%d.%m.%Y %H:%M')
+
+    return data
+
+
+def get_assembly_payload(assembly_id):
+    """Cached detail payload, rebuilt with a fixed number of queries when the version moved on"""
+    key = payload_key(assembly_id, get_version(assembly_id))
+    data = cache.get(key)
+    if data is None:
+        assembly = detail_queryset().get(pk=assembly_id)
+        data = dict(build_assembly_payload(assembly))
+        timeout = IN_PROGRESS_TIMEOUT if assembly.status == 'in_progress' else FINISHED_TIMEOUT
+        cache.set(key, data, timeout)
+    return data
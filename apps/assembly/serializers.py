@@ -1,7 +1,10 @@
+from datetime import timedelta
+
+from django.utils import timezone
 from rest_framework import serializers
 from apps.assembly.models import AssemblyProcess, AssemblyPart, AssemblyLog
 from apps.parts.models import Part
-from apps.planes.models import Aircraft
+from apps.planes.models import Aircraft, AIRCRAFT_TYPES
 
 class PartBriefSerializer(serializers.ModelSerializer):
     """Simplified part serializer for use in assembly views"""
@@ -48,16 +51,35 @@ class AssemblyPartSerializer(serializers.ModelSerializer):
         read_only_fields = ['added_by', 'added_at']
 
 class AssemblyLogSerializer(serializers.ModelSerializer):
+    """Log entry with the user and part inlined, also serializes AssemblyLogArchive rows"""
     action_display = serializers.CharField(source='get_action_display', read_only=True)
+    action_by = serializers.SerializerMethodField()
+    part = serializers.SerializerMethodField()
     
     class Meta:
         model = AssemblyLog
         fields = ['id', 'action', 'action_display', 'action_by', 'timestamp', 'part', 'notes']
         read_only_fields = ['action_by', 'timestamp']
+    
+    def get_action_by(self, obj):
+        if not obj.action_by:
+            return {'username': 'Bilinmeyen Kullanıcı'}
+        return {
+            'id': obj.action_by.id,
+            'username': obj.action_by.username
+        }
+    
+    def get_part(self, obj):
+        if not obj.part:
+            return None
+        return {
+            'id': obj.part.id,
+            'part_type': obj.part.part_type,
+            'part_type_display': obj.part.get_part_type_display()
+        }
 
 class AssemblyProcessSerializer(serializers.ModelSerializer):
     parts = AssemblyPartSerializer(source='assemblypart_set', many=True, read_only=True)
-    logs = AssemblyLogSerializer(source='assemblylog_set', many=True, read_only=True)
     aircraft_type_display = serializers.CharField(source='get_aircraft_type_display', read_only=True)
     status_display = serializers.CharField(source='get_status_display', read_only=True)
     missing_parts = serializers.ListField(source='get_missing_parts', read_only=True)
@@ -66,7 +88,7 @@ class AssemblyProcessSerializer(serializers.ModelSerializer):
         model = AssemblyProcess
         fields = ['id', 'aircraft_type', 'aircraft_type_display', 'started_by', 'completed_by', 
                   'start_date', 'completion_date', 'status', 'status_display', 'aircraft', 
-                  'parts', 'logs', 'missing_parts']
+                  'parts', 'missing_parts']
         read_only_fields = ['started_by', 'completed_by', 'start_date', 'completion_date', 'aircraft']
         
     def validate(self, data):
@@ -76,6 +98,42 @@ class AssemblyProcessSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError({"aircraft_type": "This field is required"})
         return data
 
+class AssemblyProcessListSerializer(serializers.ModelSerializer):
+    """
+    Summary row for the assembly list page.
+    Expects the annotated queryset from AssemblyProcessViewSet (parts_count, missing_parts_count)
+    """
+    aircraft_type_display = serializers.CharField(source='get_aircraft_type_display', read_only=True)
+    status_display = serializers.CharField(source='get_status_display', read_only=True)
+    started_by = serializers.CharField(source='started_by.username', default=None, read_only=True)
+    completed_by = serializers.CharField(source='completed_by.username', default=None, read_only=True)
+    parts_count = serializers.IntegerField(read_only=True)
+    missing_parts_count = serializers.IntegerField(read_only=True)
+    
+    class Meta:
+        model = AssemblyProcess
+        fields = ['id', 'aircraft_type', 'aircraft_type_display', 'status', 'status_display',
+                  'started_by', 'start_date', 'completed_by', 'completion_date',
+                  'parts_count', 'missing_parts_count']
+
+class AircraftListSerializer(serializers.ModelSerializer):
+    """
+    Row of the completed aircraft list, expects parts_count from the annotated queryset.
+    Parts are only nested when the serializer context has include_parts
+    """
+    aircraft_type_display = serializers.CharField(source='get_aircraft_type_display', read_only=True)
+    parts_count = serializers.IntegerField(read_only=True)
+    parts = PartBriefSerializer(source='part_set', many=True, read_only=True)
+    
+    class Meta:
+        model = Aircraft
+        fields = ['id', 'aircraft_type', 'aircraft_type_display', 'assembled_at', 'parts_count', 'parts']
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if not self.context.get('include_parts'):
+            self.fields.pop('parts')
+
 class AircraftDetailSerializer(serializers.ModelSerializer):
     """Detailed aircraft serializer including parts"""
     parts = PartBriefSerializer(source='part_set', many=True, read_only=True)
@@ -83,4 +141,29 @@ class AircraftDetailSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Aircraft
-        fields = ['id', 'aircraft_type', 'aircraft_type_display', 'assembled_at', 'parts'] 
\ No newline at end of file
+        fields = ['id', 'aircraft_type', 'aircraft_type_display', 'assembled_at', 'parts'] 
+
+
+class KitAllocationSerializer(serializers.Serializer):
+    """Input of the kit allocation action: how many assemblies of which aircraft type to start"""
+    aircraft_type = serializers.ChoiceField(choices=AIRCRAFT_TYPES)
+    count = serializers.IntegerField(min_value=1, max_value=50)
+
+
+class AnalyticsQuerySerializer(serializers.Serializer):
+    """Query parameters of the analytics reports, the range defaults to the last 90 days"""
+    default_days = 90
+    max_days = 366 * 5
+
+    period = serializers.ChoiceField(choices=['day', 'week'], default='day')
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+
+    def validate(self, attrs):
+        attrs.setdefault('date_to', timezone.localdate())
+        attrs.setdefault('date_from', attrs['date_to'] - timedelta(days=self.default_days - 1))
+        if attrs['date_from'] > attrs['date_to']:
+            raise serializers.ValidationError("date_from must not be after date_to")
+        if (attrs['date_to'] - attrs['date_from']).days >= self.max_days:
+            raise serializers.ValidationError(f"The range can span at most {self.max_days} days")
+        return attrs
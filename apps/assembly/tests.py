@@ -1,11 +1,24 @@
+import asyncio
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import connection, transaction
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
 from rest_framework.test import APITestCase, APIClient
 from rest_framework import status
 
-from apps.assembly.models import AssemblyProcess, AssemblyPart, AssemblyLog
-from apps.parts.models import Part
+from apps.assembly.events import INVENTORY_CHANNEL, PostgresBroker, assembly_channel, get_broker
+from apps.assembly.kits import allocate_kits
+from apps.assembly.models import AssemblyProcess, AssemblyPart, AssemblyLog, AssemblyLogArchive
+from apps.assembly.pagination import AircraftKeysetPagination, AssemblyKeysetPagination
+from apps.assembly.payloads import get_assembly_payload
+from apps.parts.models import Part, PART_TYPES, StockLevel
+from apps.parts.stock import rebuild_stock
 from apps.planes.models import Aircraft
 from apps.accounts.models import User, Team
 from apps.assembly.views import IsAssemblyTeamMember
@@ -223,6 +236,348 @@ class AssemblyAPITests(APITestCase):
         self.assertEqual(log.action, 'started')
         self.assertEqual(log.action_by, self.assembler)
     
+    """Test searching assembly processes by id and starter username"""
+    def test_search_assembly_processes(self):
+        first = AssemblyProcess.objects.create(aircraft_type='TB2', started_by=self.assembler)
+        second = AssemblyProcess.objects.create(aircraft_type='AKINCI', started_by=self.wing_user)
+        
+        self.client.force_authenticate(user=self.assembler)
+        
+        response = self.client.get(self.assembly_list_url, {'search': str(second.id)})
+        self.assertEqual([item['id'] for item in response.data['results']], [second.id])
+        
+        response = self.client.get(self.assembly_list_url, {'search': 'assembler'})
+        self.assertEqual([item['id'] for item in response.data['results']], [first.id])
+        
+        # Aircraft types are matched against their choices, partial and case-insensitive like before
+        response = self.client.get(self.assembly_list_url, {'search': 'akin'})
+        self.assertEqual([item['id'] for item in response.data['results']], [second.id])
+        response = self.client.get(self.assembly_list_url, {'search': 'tb'})
+        self.assertEqual([item['id'] for item in response.data['results']], [first.id])
+    
+    """Test assembly lists answer 304 until an assembly changes"""
+    def test_assembly_list_conditional_get(self):
+        assembly = AssemblyProcess.objects.create(aircraft_type='TB2', started_by=self.assembler)
+        self.client.force_authenticate(user=self.assembler)
+        
+        etag = self.client.get(self.assembly_list_url)['ETag']
+        response = self.client.get(self.assembly_list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        
+        add_url = reverse('assembly-process-add-part', args=[assembly.id])
+        self.client.post(add_url, {'part_id': self.wing_part.id}, format='json')
+        response = self.client.get(self.assembly_list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+    
+    """Test the list returns summary rows with part counts in a constant number of queries"""
+    def test_assembly_list_summary_rows(self):
+        assembly = AssemblyProcess.objects.create(aircraft_type='TB2', started_by=self.assembler)
+        AssemblyPart.objects.create(assembly=assembly, part=self.wing_part, added_by=self.assembler)
+        AssemblyPart.objects.create(assembly=assembly, part=self.body_part, added_by=self.assembler)
+        self.client.force_authenticate(user=self.assembler)
+        
+        response = self.client.get(self.assembly_list_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        row = response.data['results'][0]
+        self.assertEqual(row['started_by'], 'assembler')
+        self.assertEqual(row['status_display'], assembly.get_status_display())
+        self.assertEqual(row['parts_count'], 2)
+        self.assertEqual(row['missing_parts_count'], 2)
+        self.assertNotIn('parts', row)
+        
+        for _ in range(5):
+            AssemblyProcess.objects.create(aircraft_type='AKINCI', started_by=self.wing_user)
+        with self.assertNumQueries(2):
+            response = self.client.get(self.assembly_list_url)
+        self.assertEqual(len(response.data['results']), 6)
+        
+        # Without paging parameters the list is still bounded to one keyset page
+        with mock.patch.object(AssemblyKeysetPagination, 'page_size', 4):
+            response = self.client.get(self.assembly_list_url)
+        self.assertEqual(len(response.data['results']), 4)
+        self.assertIsNotNone(response.data['next'])
+    
+    """Test DataTables paging and status filtering on the assembly list"""
+    def test_assembly_list_datatables_paging(self):
+        for _ in range(3):
+            AssemblyProcess.objects.create(aircraft_type='TB2', started_by=self.assembler)
+        AssemblyProcess.objects.create(aircraft_type='TB2', started_by=self.assembler, status='cancelled')
+        self.client.force_authenticate(user=self.assembler)
+        
+        response = self.client.get(self.assembly_list_url, {'draw': 3, 'start': 0, 'length': 2})
+        self.assertEqual(response.data['draw'], 3)
+        self.assertEqual(response.data['recordsTotal'], 4)
+        self.assertEqual(response.data['recordsFiltered'], 4)
+        self.assertEqual(len(response.data['data']), 2)
+        
+        response = self.client.get(self.assembly_list_url, {'draw': 4, 'start': 0, 'length': 10, 'status': 'cancelled'})
+        self.assertEqual(response.data['recordsTotal'], 4)
+        self.assertEqual(response.data['recordsFiltered'], 1)
+        self.assertEqual(response.data['data'][0]['status'], 'cancelled')
+    
+    """Test adding a full kit writes all parts in one pass and rejects duplicate types"""
+    def test_add_part_kit(self):
+        assembly = AssemblyProcess.objects.create(aircraft_type='TB2', started_by=self.assembler)
+        spare_wing = Part.objects.create(
+            part_type='wing', aircraft_type='TB2', team=self.wing_team, creator=self.wing_user
+        )
+        self.client.force_authenticate(user=self.assembler)
+        add_url = reverse('assembly-process-add-part', args=[assembly.id])
+        part_ids = [self.wing_part.id, self.body_part.id, self.tail_part.id, self.avionics_part.id, spare_wing.id]
+        rebuild_stock()
+        
+        with self.assertNumQueries(13):
+            response = self.client.post(add_url, {'part_ids': part_ids}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data['added_parts']), 4)
+        self.assertEqual([error['part_id'] for error in response.data['errors']], [spare_wing.id])
+        self.assertEqual(assembly.assemblypart_set.count(), 4)
+        self.assertEqual(AssemblyLog.objects.filter(assembly=assembly, action='added_part').count(), 4)
+        
+        # Every part is taken now, nothing is written
+        response = self.client.post(add_url, {'part_ids': [self.wing_part.id, 'x']}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(len(response.data['errors']), 2)
+    
+    """Test kit allocation starts assemblies with the oldest free part of each type"""
+    def test_start_kits(self):
+        for part_type in ('wing', 'body', 'tail', 'avionics'):
+            Part.objects.create(part_type=part_type, aircraft_type='TB2', team=self.wing_team, creator=self.wing_user)
+        # Only one more wing, so only two kits can be made
+        Part.objects.create(part_type='wing', aircraft_type='TB2', team=self.wing_team, creator=self.wing_user)
+        self.client.force_authenticate(user=self.assembler)
+        kits_url = reverse('assembly-process-start-kits')
+        
+        response = self.client.post(kits_url, {'aircraft_type': 'TB2', 'count': 3}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['kitted'], 2)
+        self.assertEqual(response.data['available']['wing'], 3)
+        self.assertEqual(response.data['available']['body'], 2)
+        
+        first = AssemblyProcess.objects.get(pk=response.data['assemblies'][0])
+        self.assertEqual(
+            set(first.assemblypart_set.values_list('part_id', flat=True)),
+            {self.wing_part.id, self.body_part.id, self.tail_part.id, self.avionics_part.id}
+        )
+        self.assertEqual(AssemblyLog.objects.filter(action='added_part').count(), 8)
+        self.assertEqual(AssemblyLog.objects.filter(action='started').count(), 2)
+        
+        response = self.client.post(kits_url, {'aircraft_type': 'TB2', 'count': 1}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['kitted'], 0)
+        self.assertEqual(response.data['available']['wing'], 1)
+    
+    """Test kit allocation touches the shared stock ledger rows only at the very end"""
+    def test_start_kits_updates_ledger_last(self):
+        rebuild_stock()
+        with transaction.atomic(), CaptureQueriesContext(connection) as queries:
+            assemblies, _ = allocate_kits('TB2', 1, self.assembler)
+        self.assertEqual(len(assemblies), 1)
+        
+        statements = [query['sql'] for query in queries.captured_queries]
+        ledger = [index for index, sql in enumerate(statements) if StockLevel._meta.db_table in sql]
+        self.assertTrue(ledger)
+        self.assertEqual(ledger, list(range(ledger[0], len(statements))))
+    
+    """Test the part picker pages each type with limit/cursor and reports full counts"""
+    def test_available_parts_limit_and_cursor(self):
+        extra_wings = [
+            Part.objects.create(part_type='wing', aircraft_type='TB2', team=self.wing_team, creator=self.wing_user)
+            for _ in range(2)
+        ]
+        assembly = AssemblyProcess.objects.create(aircraft_type='TB2', started_by=self.assembler)
+        AssemblyPart.objects.create(assembly=assembly, part=self.body_part, added_by=self.assembler)
+        rebuild_stock()
+        self.client.force_authenticate(user=self.assembler)
+        url = reverse('available-parts', args=['TB2'])
+        
+        # Ledger totals plus one UNION ALL of the per-type pages (one query per type on SQLite)
+        page_queries = 1 if connection.features.supports_slicing_ordering_in_compound else len(PART_TYPES)
+        with self.assertNumQueries(1 + page_queries):
+            response = self.client.get(url, {'limit': 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        wings = response.data['wing']
+        self.assertEqual(wings['count'], 3)
+        self.assertEqual([part['id'] for part in wings['parts']], [self.wing_part.id, extra_wings[0].id])
+        self.assertEqual(wings['parts'][0]['team'], 'Wing Team')
+        self.assertEqual(response.data['body']['count'], 0)
+        self.assertIsNone(response.data['tail']['next'])
+        
+        response = self.client.get(url, {'limit': 2, 'part_type': 'wing', 'cursor': wings['next']})
+        self.assertEqual(list(response.data), ['wing'])
+        self.assertEqual([part['id'] for part in response.data['wing']['parts']], [extra_wings[1].id])
+        self.assertIsNone(response.data['wing']['next'])
+    
+    """Test the log endpoint pages the history newest first and detail payloads skip it"""
+    def test_assembly_logs_endpoint(self):
+        assembly = AssemblyProcess.objects.create(aircraft_type='TB2', started_by=self.assembler)
+        for _ in range(3):
+            AssemblyLog.objects.create(assembly=assembly, action_by=self.assembler, action='added_part', part=self.wing_part)
+        self.client.force_authenticate(user=self.assembler)
+        
+        response = self.client.get(reverse('assembly-process-detail', args=[assembly.id]))
+        self.assertNotIn('logs', response.data)
+        
+        logs_url = reverse('assembly-process-logs', args=[assembly.id])
+        response = self.client.get(logs_url, {'page_size': 2})
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertEqual(response.data['results'][0]['action_by']['username'], 'assembler')
+        self.assertEqual(response.data['results'][0]['part']['part_type'], 'wing')
+        
+        response = self.client.get(response.data['next'])
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertIsNone(response.data['next'])
+    
+    """Test old finished assemblies have their logs moved to the archive and still readable"""
+    def test_archive_assembly_logs_command(self):
+        old = AssemblyProcess.objects.create(
+            aircraft_type='TB2', started_by=self.assembler, status='completed',
+            completion_date=timezone.now() - timedelta(days=400)
+        )
+        recent = AssemblyProcess.objects.create(
+            aircraft_type='TB2', started_by=self.assembler, status='cancelled', completion_date=timezone.now()
+        )
+        old_log = AssemblyLog.objects.create(assembly=old, action_by=self.assembler, action='completed')
+        AssemblyLog.objects.create(assembly=recent, action_by=self.assembler, action='cancelled')
+        
+        out = StringIO()
+        call_command('archive_assembly_logs', '--days', '180', stdout=out)
+        self.assertIn('Archived 1 log row(s) of 1 assembly process(es)', out.getvalue())
+        self.assertFalse(AssemblyLog.objects.filter(assembly=old).exists())
+        self.assertTrue(AssemblyLog.objects.filter(assembly=recent).exists())
+        self.assertTrue(AssemblyLogArchive.objects.filter(pk=old_log.pk, action='completed').exists())
+        
+        self.client.force_authenticate(user=self.assembler)
+        response = self.client.get(reverse('assembly-process-logs', args=[old.id]))
+        self.assertEqual([log['id'] for log in response.data['results']], [old_log.id])
+    
+    """Test add_part announces the change to assembly and inventory subscribers after commit"""
+    def test_add_part_publishes_events(self):
+        assembly = AssemblyProcess.objects.create(aircraft_type='TB2', started_by=self.assembler)
+        self.client.force_authenticate(user=self.assembler)
+        add_url = reverse('assembly-process-add-part', args=[assembly.id])
+        
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.client.post(add_url, {'part_id': self.wing_part.id}, format='json')
+        
+        broker = get_broker()
+        channels = [assembly_channel(assembly.id), INVENTORY_CHANNEL]
+        
+        async def subscribe():
+            return broker.subscribe(channels)
+        
+        async def receive(queue):
+            return [await asyncio.wait_for(queue.get(), timeout=1) for _ in range(2)]
+        
+        # Subscribe on a loop, run the commit callbacks synchronously, then drain the queue on that loop
+        loop = asyncio.new_event_loop()
+        try:
+            queue = loop.run_until_complete(subscribe())
+            for callback in callbacks:
+                callback()
+            added, reserved = loop.run_until_complete(receive(queue))
+        finally:
+            broker.unsubscribe(channels, queue)
+            loop.close()
+        self.assertEqual(added['event'], 'parts_added')
+        self.assertEqual(added['data']['parts'][0]['id'], self.wing_part.id)
+        self.assertEqual(reserved['event'], 'parts_reserved')
+        self.assertEqual(reserved['data'], {'aircraft_type': 'TB2', 'part_ids': [self.wing_part.id]})
+    
+    """Test the Postgres listener closes a failed connection and reconnects after any error"""
+    def test_postgres_listener_reconnects(self):
+        class StopListening(BaseException):
+            pass
+        
+        failed = mock.MagicMock()
+        failed.cursor.return_value.__enter__.return_value.execute.side_effect = RuntimeError("boom")
+        
+        with mock.patch('psycopg2.connect', side_effect=[failed, StopListening()]) as connect, \
+                mock.patch('apps.assembly.events.time.sleep'), \
+                self.assertLogs('apps.assembly.events', level='ERROR'):
+            with self.assertRaises(StopListening):
+                PostgresBroker().listen()
+        
+        self.assertEqual(connect.call_count, 2)
+        failed.close.assert_called_once()
+    
+    """Test the event stream is closed to anonymous users"""
+    async def test_assembly_events_requires_assembly_team(self):
+        response = await self.async_client.get(reverse('assembly-events'))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+    
+    """Test the event stream is refused under WSGI instead of holding a worker open"""
+    def test_assembly_events_requires_asgi(self):
+        self.client.force_login(self.assembler)
+        response = self.client.get(reverse('assembly-events'))
+        self.assertEqual(response.status_code, status.HTTP_501_NOT_IMPLEMENTED)
+        self.assertIn('error', response.json())
+    
+    """Test the detail payload is cached until an assembly action bumps its version"""
+    def test_assembly_detail_payload_cache(self):
+        assembly = AssemblyProcess.objects.create(aircraft_type='TB2', started_by=self.assembler)
+        AssemblyPart.objects.create(assembly=assembly, part=self.body_part, added_by=self.assembler)
+        self.client.force_authenticate(user=self.assembler)
+        detail_url = reverse('assembly-process-detail', args=[assembly.id])
+        
+        response = self.client.get(detail_url)
+        self.assertEqual(response.data['started_by']['username'], 'assembler')
+        self.assertEqual(len(response.data['parts']), 1)
+        self.assertNotIn('body', response.data['missing_parts'])
+        
+        # Out-of-band change, the cached payload is still served
+        AssemblyPart.objects.create(assembly=assembly, part=self.tail_part, added_by=self.assembler)
+        self.assertEqual(len(self.client.get(detail_url).data['parts']), 1)
+        
+        # A hit reads the version and the payload, nothing is written
+        with self.assertNumQueries(2):
+            get_assembly_payload(assembly.id)
+        
+        add_url = reverse('assembly-process-add-part', args=[assembly.id])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(add_url, {'part_id': self.wing_part.id}, format='json')
+        self.assertEqual(len(self.client.get(detail_url).data['parts']), 3)
+    
+    """Test the completed aircraft list counts parts in one query and nests them only on request"""
+    def test_completed_aircraft_list(self):
+        for _ in range(3):
+            aircraft = Aircraft.objects.create(aircraft_type='TB2')
+        for part in (self.wing_part, self.body_part):
+            part.used_in_aircraft = aircraft
+            part.save()
+        self.client.force_authenticate(user=self.assembler)
+        aircraft_url = reverse('completed-aircraft-list')
+        
+        with self.assertNumQueries(2):
+            response = self.client.get(aircraft_url)
+        rows = response.data['results']
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[0]['id'], aircraft.id)
+        self.assertEqual(rows[0]['parts_count'], 2)
+        self.assertNotIn('parts', rows[0])
+        
+        # Without paging parameters the list is still bounded to one keyset page
+        with mock.patch.object(AircraftKeysetPagination, 'page_size', 2):
+            response = self.client.get(aircraft_url)
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertIsNotNone(response.data['next'])
+        
+        response = self.client.get(aircraft_url, {'include_parts': 1})
+        rows = response.data['results']
+        self.assertEqual(len(rows[0]['parts']), 2)
+        self.assertEqual(rows[0]['parts'][0]['team_info']['name'], 'Wing Team')
+        
+        response = self.client.get(aircraft_url, {'draw': 1, 'start': 0, 'length': 2})
+        self.assertEqual(response.data['recordsTotal'], 3)
+        self.assertEqual(len(response.data['data']), 2)
+        
+        # The DataTables grid orders by the annotated count, keyset pages only by their cursor
+        response = self.client.get(aircraft_url, {'ordering': '-parts_count'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(aircraft_url, {'draw': 1, 'start': 0, 'length': 10, 'ordering': '-parts_count'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['data'][0]['id'], aircraft.id)
+    
     """Test that non-assembly team members cannot create assembly processes"""
     def test_non_assembly_team_cannot_create_assembly(self):
         # Login as wing team member
@@ -291,7 +646,77 @@ class AssemblyAPITests(APITestCase):
         for part in [self.wing_part, self.body_part, self.tail_part, self.avionics_part]:
             part.refresh_from_db()
             self.assertEqual(part.used_in_aircraft, aircraft)
+    
+    """Test adding parts and completing an assembly keeps the stock ledger in step"""
+    def test_stock_ledger_follows_assembly(self):
+        call_command('rebuild_stock_levels', stdout=StringIO())
+        
+        self.client.force_authenticate(user=self.assembler)
+        assembly = AssemblyProcess.objects.create(aircraft_type='TB2', started_by=self.assembler)
+        
+        add_url = reverse('assembly-process-add-part', args=[assembly.id])
+        for part in [self.wing_part, self.body_part, self.tail_part, self.avionics_part]:
+            response = self.client.post(add_url, {'part_id': part.id}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        
+        self.assertEqual(StockLevel.objects.get(aircraft_type='TB2', part_type='wing').in_assembly, 1)
+        
+        complete_url = reverse('assembly-process-complete-assembly', args=[assembly.id])
+        self.client.post(complete_url, {}, format='json')
+        
+        levels = StockLevel.objects.filter(aircraft_type='TB2')
+        self.assertEqual(sum(level.used for level in levels), 4)
+        self.assertEqual(sum(level.available + level.in_assembly for level in levels), 0)
+        call_command('rebuild_stock_levels', '--verify', stdout=StringIO())
 
+    
+    """Test the analytics reports group by period in one query and are cached"""
+    def test_production_analytics(self):
+        Aircraft.objects.create(aircraft_type='TB2')
+        Aircraft.objects.create(aircraft_type='TB2')
+        Aircraft.objects.create(aircraft_type='TB3')
+        
+        assembly = AssemblyProcess.objects.create(aircraft_type='TB2', started_by=self.assembler)
+        AssemblyProcess.objects.filter(pk=assembly.pk).update(
+            status='completed',
+            start_date=timezone.now() - timedelta(hours=3),
+            completion_date=timezone.now(),
+        )
+        
+        self.client.force_authenticate(user=self.assembler)
+        aircraft_url = reverse('production-analytics', args=['aircraft'])
+        
+        response = self.client.get(aircraft_url, {'period': 'week'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(row['aircraft_type'], row['count']) for row in response.data['rows']],
+            [('TB2', 2), ('TB3', 1)]
+        )
+        
+        # A repeated request is served from the cache
+        Aircraft.objects.create(aircraft_type='TB3')
+        with self.assertNumQueries(1):
+            response = self.client.get(aircraft_url, {'period': 'week'})
+        self.assertEqual(response.data['rows'][1]['count'], 1)
+        
+        response = self.client.get(reverse('production-analytics', args=['parts']))
+        self.assertEqual(sum(row['count'] for row in response.data['rows']), 4)
+        self.assertEqual(response.data['rows'][0]['period'], timezone.localdate())
+        
+        response = self.client.get(reverse('production-analytics', args=['lead-time']))
+        row = response.data['rows'][0]
+        self.assertEqual((row['aircraft_type'], row['count']), ('TB2', 1))
+        self.assertAlmostEqual(row['average_seconds'], 3 * 60 * 60, delta=5)
+        
+        response = self.client.get(aircraft_url, {'date_from': '2026-02-01', 'date_to': '2026-01-01'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(reverse('production-analytics', args=['unknown']))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        
+        # Other teams don't see production numbers
+        self.client.force_authenticate(user=self.wing_user)
+        response = self.client.get(aircraft_url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
 
 class AssemblyPermissionTests(TestCase):
     """Tests for assembly permissions"""
@@ -4,6 +4,8 @@ from apps.assembly.views import (
     AssemblyProcessViewSet,
     AvailablePartsView,
     CompletedAircraftViewSet,
+    ProductionAnalyticsView,
+    assembly_events_view,
     assembly_list_view,
     assembly_detail_view,
     aircraft_detail_view
@@ -24,6 +26,8 @@ template_urlpatterns = [
 api_urlpatterns = [
     path('api/', include(router.urls)),
     path('api/available-parts/<str:aircraft_type>/', AvailablePartsView.as_view(), name='available-parts'),
+    path('api/events/', assembly_events_view, name='assembly-events'),
+    path('api/analytics/<str:report>/', ProductionAnalyticsView.as_view(), name='production-analytics'),
 ]
 
 urlpatterns = template_urlpatterns + api_urlpatterns
@@ -1,23 +1,57 @@
+import asyncio
+import json
+
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
 from django.shortcuts import render, get_object_or_404
 from django.utils import timezone
-from django.db import transaction
+from django.db import DatabaseError, connection, transaction
+from django.db.models import Count, F, Prefetch, Q, Value
+from django_filters.rest_framework import DjangoFilterBackend
 
-from rest_framework import viewsets, status, permissions
+from rest_framework import viewsets, status, permissions, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from apps.accounts.models import User, Team
-from apps.parts.models import Part, PART_TYPES
+from apps.accounts.dashboard import invalidate_dashboard
+from apps.parts.models import Part, PART_TYPES, StockLevel
+from apps.parts.stock import move_stock
+from apps.parts.search import TrigramSearchFilter
+from apps.parts.conditional import ConditionalGetMixin
+from apps.parts.pagination import KeysetPagination
+from apps.parts.locking import conflict_response, is_lock_conflict
+from apps.parts.idempotency import idempotent
 from apps.planes.models import Aircraft
-from apps.assembly.models import AssemblyProcess, AssemblyPart, AssemblyLog
+from apps.assembly.models import AssemblyProcess, AssemblyPart, AssemblyLog, AssemblyLogArchive
+from apps.assembly.events import (
+    INVENTORY_CHANNEL,
+    assembly_channel,
+    get_broker,
+    part_payload,
+    publish_assembly_event,
+    publish_inventory_event
+)
+from apps.assembly.kits import allocate_kits
+from apps.assembly.analytics import REPORTS, get_report
+from apps.assembly.pagination import AircraftPagination, AssemblyPagination, AssemblyLogPagination
+from apps.assembly.payloads import bump_version, get_assembly_payload
 from apps.assembly.serializers import (
     AssemblyProcessSerializer, 
+    AssemblyProcessListSerializer,
     AssemblyPartSerializer,
     AssemblyLogSerializer,
-    AircraftDetailSerializer
+    AircraftDetailSerializer,
+    AircraftListSerializer,
+    AnalyticsQuerySerializer,
+    KitAllocationSerializer
 )
 
+# Reconnect delay sent to EventSource clients and the idle interval between keepalive comments
+EVENTS_RETRY_MS = 3000
+EVENTS_KEEPALIVE_SECONDS = 15
+
 # Permission class to check if user is in assembly team
 class IsAssemblyTeamMember(permissions.BasePermission):
     """
@@ -26,48 +60,45 @@ class IsAssemblyTeamMember(permissions.BasePermission):
     message = "You must be a member of the assembly team to perform this action."
     
     def has_permission(self, request, view):
-        return request.user.is_authenticated and request.user.team and request.user.team.team_type == 'assembly'
+        # team is loaded with the user by the authentication layer, this costs no query
+        return bool(request.user.is_authenticated and request.user.team_id and request.user.team.is_assembly)
 
 
-class AssemblyProcessViewSet(viewsets.ModelViewSet):
+class AssemblyProcessViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """
     ViewSet for Assembly Processes.
     Only assembly team members can access this.
     """
     serializer_class = AssemblyProcessSerializer
     permission_classes = [IsAssemblyTeamMember]
+    pagination_class = AssemblyPagination
+    filter_backends = [DjangoFilterBackend, TrigramSearchFilter, filters.OrderingFilter]
+    filterset_fields = ['status', 'aircraft_type']
+    search_fields = ['id', 'aircraft_type', 'started_by__username', 'completed_by__username']
+    ordering_fields = ['id', 'aircraft_type', 'status', 'start_date', 'completion_date']
+    ordering = ['-start_date', '-id']
     
     """Get all assembly processes"""
     def get_queryset(self):
-        return AssemblyProcess.objects.all().order_by('-start_date')
+        queryset = AssemblyProcess.objects.all().order_by('-start_date', '-id')
+        if self.action == 'list':
+            # Everything the summary row needs, in one query
+            return queryset.select_related('started_by', 'completed_by').annotate(
+                parts_count=Count('assemblypart'),
+                missing_parts_count=Value(len(PART_TYPES)) - Count('assemblypart__part__part_type', distinct=True)
+            )
+        return queryset
     
-    """List method to add formatted data to each item"""
-    def list(self, request, *args, **kwargs):
-        queryset = self.get_queryset()
-        serializer = self.get_serializer(queryset, many=True)
-        data = serializer.data
-        
-        # Add explicit display values to each item
-        for item in data:
-            assembly = AssemblyProcess.objects.get(id=item['id'])
-            item['get_status_display'] = assembly.get_status_display()
-            item['get_aircraft_type_display'] = assembly.get_aircraft_type_display()
-            
-            # Format dates
-            if item['start_date']:
-                item['start_date'] = assembly.start_date.strftime('%d.%m.%Y %H:%M')
-            
-            if item['completion_date']:
-                item['completion_date'] = assembly.completion_date.strftime('%d.%m.%Y %H:%M')
-                
-            # Add user information
-            if assembly.started_by:
-                item['started_by'] = assembly.started_by.username
-            
-            if assembly.completed_by:
-                item['completed_by'] = assembly.completed_by.username
-
-        return Response(data)
+    """Validators only need the filtered rows, not the per-row part counts"""
+    def get_conditional_queryset(self):
+        if self.action == 'list':
+            return self.filter_queryset(AssemblyProcess.objects.all())
+        return super().get_conditional_queryset()
+    
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return AssemblyProcessListSerializer
+        return AssemblyProcessSerializer
     
     """Create a new assembly process and log it"""
     def perform_create(self, serializer):
@@ -78,86 +109,79 @@ class AssemblyProcessViewSet(viewsets.ModelViewSet):
             action_by=self.request.user,
             action='started'
         )
+        invalidate_dashboard()
     
-    """Override retrieve to add formatted data"""
+    """Plain updates change the cached detail payload as well"""
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        bump_version(serializer.instance.id)
+    
+    """Serve the shared, cached detail payload"""
     def retrieve(self, request, *args, **kwargs):
         instance = self.get_object()
-        serializer = self.get_serializer(instance)
-        data = serializer.data
-        
-        # Add explicit display values
-        data['get_status_display'] = instance.get_status_display()
-        data['get_aircraft_type_display'] = instance.get_aircraft_type_display()
+        data = dict(get_assembly_payload(instance.pk))
         
-        # Add user information
-        if instance.started_by:
-            data['started_by'] = {
-                'username': instance.started_by.username,
-                'id': instance.started_by.id
-            }
-        
-        if instance.completed_by:
-            data['completed_by'] = {
-                'username': instance.completed_by.username,
-                'id': instance.completed_by.id
-            }
-        
-        # Format dates
-        if instance.start_date:
-            data['start_date'] = instance.start_date.strftime('%d.%m.%Y %H:%M')
-        
-        if instance.completion_date:
-            data['completion_date'] = instance.completion_date.strftime('%d.%m.%Y %H:%M')
-        
-        # Format logs with user and part information
-        logs = instance.assemblylog_set.all().order_by('-timestamp')
-        log_data = []
-        
-        for log in logs:
-            log_entry = {
-                'action': log.action,
-                'action_display': log.get_action_display(),
-                'timestamp': log.timestamp.strftime('%d.%m.%Y %H:%M'),
-                'notes': log.notes,
-            }
-            
-            # Add action_by information
-            if log.action_by:
-                log_entry['action_by'] = {
-                    'username': log.action_by.username,
-                    'id': log.action_by.id
-                }
-            else:
-                log_entry['action_by'] = {
-                    'username': 'Bilinmeyen Kullanıcı'
-                }
-            
-            # Add part information if available
-            if log.part:
-                log_entry['part'] = {
-                    'id': log.part.id,
-                    'part_type': log.part.part_type,
-                    'part_type_display': log.part.get_part_type_display()
-                }
-            
-            log_data.append(log_entry)
-        
-        data['logs'] = log_data
+        # The history is served page by page from the logs action, embed it only on request
+        if request.query_params.get('include_logs') in ('1', 'true'):
+            page = self.get_log_queryset(instance)[:AssemblyLogPagination.page_size]
+            data['logs'] = AssemblyLogSerializer(page, many=True).data
         
         return Response(data)
     
+    """Log entries of an assembly, from the archive table once they were moved there"""
+    def get_log_queryset(self, assembly):
+        model = AssemblyLogArchive if assembly.logs_archived else AssemblyLog
+        return model.objects.filter(assembly=assembly).select_related('action_by', 'part').order_by('-timestamp', '-id')
+    
+    """Paginated assembly history, newest first, with a timestamp cursor"""
+    @action(detail=True, methods=['get'])
+    def logs(self, request, pk=None):
+        assembly = self.get_object()
+        paginator = AssemblyLogPagination()
+        page = paginator.paginate_queryset(self.get_log_queryset(assembly), request, view=self)
+        return paginator.get_paginated_response(AssemblyLogSerializer(page, many=True).data)
+    
+    """
+    Start several assemblies at once with a full kit of the oldest available parts each.
+    Reports how many could be kitted and how many parts of each type were free
+    """
+    @action(detail=False, methods=['post'], url_path='kits')
+    def start_kits(self, request):
+        serializer = KitAllocationSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        aircraft_type = serializer.validated_data['aircraft_type']
+        count = serializer.validated_data['count']
+        
+        try:
+            with transaction.atomic():
+                assemblies, available = allocate_kits(aircraft_type, count, request.user)
+        except DatabaseError as exc:
+            if not is_lock_conflict(exc):
+                raise
+            return conflict_response()
+        
+        data = {
+            "requested": count,
+            "kitted": len(assemblies),
+            "assemblies": [assembly.id for assembly in assemblies],
+            "available": available,
+        }
+        if not assemblies:
+            data["error"] = "Not enough available parts to kit a single assembly"
+            return Response(data, status=status.HTTP_400_BAD_REQUEST)
+        return Response(data, status=status.HTTP_201_CREATED)
+    
+    """Fetch the assembly locked for the rest of the transaction, fails fast if another request holds it"""
+    def get_locked_object(self):
+        queryset = self.get_queryset().select_for_update(nowait=True)
+        assembly = get_object_or_404(queryset, pk=self.kwargs['pk'])
+        self.check_object_permissions(self.request, assembly)
+        return assembly
+    
     """Add parts to the assembly process"""
     @action(detail=True, methods=['post'])
+    @idempotent
     def add_part(self, request, pk=None):
-        assembly = self.get_object()
-        
-        # Check if assembly is already completed
-        if assembly.status != 'in_progress':
-            return Response(
-                {"error": "Cannot add parts to a completed or cancelled assembly"}, 
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
         # Check if we're getting a single part or multiple parts
         if 'part_id' in request.data:
             # Handle single part case
@@ -171,109 +195,136 @@ class AssemblyProcessViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        added_parts = []
         errors = []
+        requested_ids = []
+        for part_id in part_ids:
+            try:
+                requested_ids.append(int(part_id))
+            except (TypeError, ValueError):
+                errors.append({"part_id": part_id, "error": "Invalid part id"})
         
-        with transaction.atomic():
-            for part_id in part_ids:
-                # Validate part data
-                part_data = {'part_id': part_id}
-                serializer = AssemblyPartSerializer(data=part_data)
-                
-                if not serializer.is_valid():
-                    errors.append({
-                        "part_id": part_id,
-                        "errors": serializer.errors
-                    })
-                    continue
+        try:
+            with transaction.atomic():
+                assembly = self.get_locked_object()
                 
-                part = serializer.validated_data['part']
+                # Check if assembly is already completed
+                if assembly.status != 'in_progress':
+                    return Response(
+                        {"error": "Cannot add parts to a completed or cancelled assembly"}, 
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
                 
-                # Check if part is compatible with the aircraft type
-                if part.aircraft_type != assembly.aircraft_type:
-                    errors.append({
-                        "part_id": part_id,
-                        "error": f"This part ({part.get_part_type_display()}) is for {part.get_aircraft_type_display()}, "
-                                f"not for {assembly.get_aircraft_type_display()}"
-                    })
-                    continue
+                # One locked query for every requested part, a part held by another assembler is a conflict
+                parts = {
+                    part.pk: part
+                    for part in Part.objects.with_usage()
+                        .select_related('creator', 'team')
+                        .select_for_update(nowait=True, of=('self',))
+                        .filter(pk__in=requested_ids)
+                        .order_by('pk')
+                }
+                taken_types = set(assembly.assemblypart_set.values_list('part__part_type', flat=True))
                 
-                # Check if part is already assigned to any assembly
-                if AssemblyPart.objects.filter(part=part).exists():
-                    errors.append({
-                        "part_id": part_id,
-                        "error": f"This part is already used in another assembly"
-                    })
-                    continue
+                accepted = []
+                for part_id in dict.fromkeys(requested_ids):
+                    part = parts.get(part_id)
+                    error = self.get_add_part_error(assembly, part, taken_types)
+                    if error:
+                        errors.append({"part_id": part_id, "error": error})
+                        continue
+                    taken_types.add(part.part_type)
+                    accepted.append(part)
                 
-                # Check if there's already a part of this type in the assembly
-                if AssemblyPart.objects.filter(assembly=assembly, part__part_type=part.part_type).exists():
-                    errors.append({
-                        "part_id": part_id,
-                        "error": f"This assembly already has a {part.get_part_type_display()} part"
-                    })
-                    continue
+                if not accepted:
+                    return Response({
+                        "added_parts": [],
+                        "errors": errors
+                    }, status=status.HTTP_400_BAD_REQUEST)
                 
-                try:
-                    # Add part to the assembly
-                    assembly_part = serializer.save(
-                        assembly=assembly,
-                        added_by=request.user
-                    )
-                    
-                    # Update the assembly last modified info
-                    assembly.completed_by = request.user
-                    assembly.completion_date = timezone.now()
-                    assembly.save()
-                    
-                    # Create log entry
-                    AssemblyLog.objects.create(
+                now = timezone.now()
+                # The one-to-one on AssemblyPart.part still rejects a part another assembly won meanwhile
+                assembly_parts = AssemblyPart.objects.bulk_create([
+                    AssemblyPart(assembly=assembly, part=part, added_by=request.user)
+                    for part in accepted
+                ])
+                AssemblyLog.objects.bulk_create([
+                    AssemblyLog(
                         assembly=assembly,
                         action_by=request.user,
                         action='added_part',
                         part=part,
                         notes=f"Eklenen parça: {part.get_part_type_display()}"
                     )
-                    
-                    added_parts.append(AssemblyPartSerializer(assembly_part).data)
-                except Exception as e:
-                    errors.append({
-                        "part_id": part_id,
-                        "error": str(e)
-                    })
-            
-            # If we weren't able to add any parts, roll back the transaction
-            if not added_parts and errors:
-                # Force a rollback by raising an exception
-                raise serializers.ValidationError(errors)
+                    for part in accepted
+                ])
+                
+                move_stock(accepted, 'available', 'in_assembly')
+                # The parts' in-use flag changed, let conditional GETs see it
+                Part.objects.filter(pk__in=[part.pk for part in accepted]).update(updated_at=now)
+                
+                publish_assembly_event(assembly, 'parts_added', parts=[part_payload(part) for part in accepted])
+                bump_version(assembly.id)
+                publish_inventory_event('parts_reserved', assembly.aircraft_type, accepted)
+                
+                # Update the assembly last modified info
+                assembly.completed_by = request.user
+                assembly.completion_date = now
+                assembly.save(update_fields=['completed_by', 'completion_date', 'updated_at'])
+        except DatabaseError as exc:
+            if not is_lock_conflict(exc):
+                raise
+            return conflict_response()
         
         # Return the results
         return Response({
-            "added_parts": added_parts,
+            "added_parts": AssemblyPartSerializer(assembly_parts, many=True).data,
             "errors": errors
-        }, status=status.HTTP_201_CREATED if added_parts else status.HTTP_400_BAD_REQUEST)
+        }, status=status.HTTP_201_CREATED)
+    
+    """Check a locked part against the assembly, returns an error message or None"""
+    def get_add_part_error(self, assembly, part, taken_types):
+        if part is None or part.is_recycled or part.used_in_aircraft_id is not None:
+            return "Part not found or no longer available"
+        
+        # Check if part is compatible with the aircraft type
+        if part.aircraft_type != assembly.aircraft_type:
+            return (f"This part ({part.get_part_type_display()}) is for {part.get_aircraft_type_display()}, "
+                    f"not for {assembly.get_aircraft_type_display()}")
+        
+        # Check if part is already assigned to any assembly
+        if part.in_assembly:
+            return "This part is already used in another assembly"
+        
+        # Check if there's already a part of this type in the assembly (or earlier in this request)
+        if part.part_type in taken_types:
+            return f"This assembly already has a {part.get_part_type_display()} part"
+        
+        return None
     
     """Remove a part from the assembly process"""
     @action(detail=True, methods=['post'])
     def remove_part(self, request, pk=None):
-        assembly = self.get_object()
-        
-        # Check if assembly is already completed
-        if assembly.status != 'in_progress':
-            return Response(
-                {"error": "Cannot remove parts from a completed or cancelled assembly"}, 
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
         part_id = request.data.get('part_id')
         if not part_id:
             return Response({"error": "Part ID is required"}, status=status.HTTP_400_BAD_REQUEST)
         
         try:
-            assembly_part = AssemblyPart.objects.get(assembly=assembly, part_id=part_id)
-            part = assembly_part.part
-            
             with transaction.atomic():
+                assembly = self.get_locked_object()
+                
+                # Check if assembly is already completed
+                if assembly.status != 'in_progress':
+                    return Response(
+                        {"error": "Cannot remove parts from a completed or cancelled assembly"}, 
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+                
+                part = Part.objects.select_for_update(nowait=True, of=('self',)).filter(
+                    pk=part_id, assemblypart__assembly=assembly
+                ).first()
+                if part is None:
+                    return Response({"error": "Part not found in this assembly"}, status=status.HTTP_404_NOT_FOUND)
+                
                 # Log the removal
                 AssemblyLog.objects.create(
                     assembly=assembly,
@@ -284,68 +335,87 @@ class AssemblyProcessViewSet(viewsets.ModelViewSet):
                 )
                 
                 # Remove the part from assembly
-                assembly_part.delete()
+                AssemblyPart.objects.filter(assembly=assembly, part=part).delete()
+                move_stock([part], 'in_assembly', 'available')
+                Part.objects.filter(pk=part.pk).update(updated_at=timezone.now())
+                
+                publish_assembly_event(assembly, 'part_removed', part=part_payload(part))
+                bump_version(assembly.id)
+                publish_inventory_event('parts_released', assembly.aircraft_type, [part])
                 
                 # Update the assembly last modified info
                 assembly.completed_by = request.user
                 assembly.completion_date = timezone.now()
                 assembly.save()
-            
-            return Response({"message": f"{part.get_part_type_display()} part removed from assembly"})
+        except DatabaseError as exc:
+            if not is_lock_conflict(exc):
+                raise
+            return conflict_response()
         
-        except AssemblyPart.DoesNotExist:
-            return Response({"error": "Part not found in this assembly"}, status=status.HTTP_404_NOT_FOUND)
+        return Response({"message": f"{part.get_part_type_display()} part removed from assembly"})
     
     """Complete an assembly process, creating an aircraft"""
     @action(detail=True, methods=['post'])
+    @idempotent
     def complete_assembly(self, request, pk=None):
-        assembly = self.get_object()
-        
-        # Check if assembly is already completed
-        if assembly.status != 'in_progress':
-            return Response(
-                {"error": "Assembly is already completed or cancelled."}, 
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        # Check if all required parts are present
-        required_parts = set(part_type for part_type, _ in PART_TYPES)
-        existing_part_types = set(assembly.assemblypart_set.values_list('part__part_type', flat=True))
-        
-        missing_parts = required_parts - existing_part_types
-        if missing_parts:
-            # Format the missing parts list with display names
-            missing_part_names = [dict(PART_TYPES)[part_type] for part_type in missing_parts]
-            return Response({
-                "error": f"Assembly is incomplete. Missing parts: {', '.join(missing_part_names)}"
-            }, status=status.HTTP_400_BAD_REQUEST)
-        
-        # All parts present, complete the assembly
-        with transaction.atomic():
-            # Create an Aircraft object
-            aircraft = Aircraft.objects.create(
-                aircraft_type=assembly.aircraft_type
-            )
-            
-            # Update all parts to mark them as used in this aircraft
-            for assembly_part in assembly.assemblypart_set.all():
-                part = assembly_part.part
-                part.used_in_aircraft = aircraft
-                part.save(update_fields=['used_in_aircraft'])
-            
-            # Update the assembly status
-            assembly.status = 'completed'
-            assembly.completed_by = request.user
-            assembly.completion_date = timezone.now()
-            assembly.save()
-            
-            # Create log entry
-            AssemblyLog.objects.create(
-                assembly=assembly,
-                action_by=request.user,
-                action='completed',
-                notes=f"Montaj tamamlandı. Uçak ID: {aircraft.id}"
-            )
+        try:
+            with transaction.atomic():
+                assembly = self.get_locked_object()
+                
+                # Check if assembly is already completed
+                if assembly.status != 'in_progress':
+                    return Response(
+                        {"error": "Assembly is already completed or cancelled."}, 
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+                
+                parts = list(
+                    Part.objects.select_for_update(nowait=True, of=('self',))
+                        .filter(assemblypart__assembly=assembly)
+                        .order_by('pk')
+                )
+                
+                # Check if all required parts are present
+                required_parts = set(part_type for part_type, _ in PART_TYPES)
+                missing_parts = required_parts - {part.part_type for part in parts}
+                if missing_parts:
+                    # Format the missing parts list with display names
+                    missing_part_names = [dict(PART_TYPES)[part_type] for part_type in missing_parts]
+                    return Response({
+                        "error": f"Assembly is incomplete. Missing parts: {', '.join(missing_part_names)}"
+                    }, status=status.HTTP_400_BAD_REQUEST)
+                
+                # All parts present, complete the assembly
+                aircraft = Aircraft.objects.create(
+                    aircraft_type=assembly.aircraft_type
+                )
+                
+                # Mark the parts as used in this aircraft
+                Part.objects.filter(pk__in=[part.pk for part in parts]).update(
+                    used_in_aircraft=aircraft, updated_at=timezone.now()
+                )
+                move_stock(parts, 'in_assembly', 'used')
+                
+                # Update the assembly status
+                assembly.status = 'completed'
+                assembly.completed_by = request.user
+                assembly.completion_date = timezone.now()
+                assembly.save()
+                
+                # Create log entry
+                AssemblyLog.objects.create(
+                    assembly=assembly,
+                    action_by=request.user,
+                    action='completed',
+                    notes=f"Montaj tamamlandı. Uçak ID: {aircraft.id}"
+                )
+                publish_assembly_event(assembly, 'completed', aircraft_id=aircraft.id)
+                bump_version(assembly.id)
+                invalidate_dashboard()
+        except DatabaseError as exc:
+            if not is_lock_conflict(exc):
+                raise
+            return conflict_response("This assembly is being changed by another request, please try again")
         
         return Response({
             "message": "Assembly completed successfully",
@@ -355,29 +425,37 @@ class AssemblyProcessViewSet(viewsets.ModelViewSet):
     """Cancel an assembly process, returning parts to inventory"""
     @action(detail=True, methods=['post'])
     def cancel_assembly(self, request, pk=None):
-        assembly = self.get_object()
-        
-        # Check if assembly is already completed
-        if assembly.status != 'in_progress':
-            return Response(
-                {"error": "Assembly is already completed or cancelled."}, 
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        with transaction.atomic():
-            # Update the assembly status
-            assembly.status = 'cancelled'
-            assembly.completed_by = request.user
-            assembly.completion_date = timezone.now()
-            assembly.save()
-            
-            # Create log entry
-            AssemblyLog.objects.create(
-                assembly=assembly,
-                action_by=request.user,
-                action='cancelled',
-                notes="Montaj iptal edildi."
-            )
+        try:
+            with transaction.atomic():
+                assembly = self.get_locked_object()
+                
+                # Check if assembly is already completed
+                if assembly.status != 'in_progress':
+                    return Response(
+                        {"error": "Assembly is already completed or cancelled."}, 
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+                
+                # Update the assembly status
+                assembly.status = 'cancelled'
+                assembly.completed_by = request.user
+                assembly.completion_date = timezone.now()
+                assembly.save()
+                
+                # Create log entry
+                AssemblyLog.objects.create(
+                    assembly=assembly,
+                    action_by=request.user,
+                    action='cancelled',
+                    notes="Montaj iptal edildi."
+                )
+                publish_assembly_event(assembly, 'cancelled')
+                bump_version(assembly.id)
+                invalidate_dashboard()
+        except DatabaseError as exc:
+            if not is_lock_conflict(exc):
+                raise
+            return conflict_response("This assembly is being changed by another request, please try again")
         
         return Response({
             "message": "Assembly cancelled successfully"
@@ -385,81 +463,211 @@ class AssemblyProcessViewSet(viewsets.ModelViewSet):
 
 
 class AvailablePartsView(APIView):
-    """View to list all available parts for a specific aircraft type"""
+    """
+    View to list available parts for a specific aircraft type.
+    Returns the oldest `limit` parts of every type, each read from part_available_idx with its own
+    LIMIT and sent as one UNION ALL, with the per-type totals from the stock ledger, so the cost
+    doesn't grow with the shelf. `part_type` + `cursor` page further into a single type
+    """
     permission_classes = [IsAssemblyTeamMember]
+    default_limit = 50
+    max_limit = 200
     
     """Get available parts for assembly by aircraft type"""
     def get(self, request, aircraft_type=None):
         if not aircraft_type:
             return Response({"error": "Aircraft type is required"}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Get available parts for this aircraft type not in use
-        available_parts = Part.objects.filter(
+        try:
+            limit = int(request.query_params.get('limit', self.default_limit))
+        except ValueError:
+            limit = self.default_limit
+        limit = min(max(limit, 1), self.max_limit)
+        
+        part_types = PART_TYPES
+        requested_type = request.query_params.get('part_type')
+        if requested_type:
+            part_types = [(part_type, name) for part_type, name in PART_TYPES if part_type == requested_type]
+            if not part_types:
+                return Response({"error": "Unknown part type"}, status=status.HTTP_400_BAD_REQUEST)
+        
+        cursor = KeysetPagination().decode_cursor(request)
+        if cursor is not None and not requested_type:
+            return Response({"error": "part_type is required with cursor"}, status=status.HTTP_400_BAD_REQUEST)
+        
+        counts = dict(StockLevel.objects.filter(
             aircraft_type=aircraft_type,
-            used_in_aircraft__isnull=True,
-            is_recycled=False
-        ).exclude(
-            id__in=AssemblyPart.objects.values_list('part_id', flat=True)
-        )
+            part_type__in=[part_type for part_type, _ in part_types]
+        ).values_list('part_type', 'available'))
+        
+        # Get available parts for this aircraft type not in use (NOT EXISTS over AssemblyPart)
+        available_parts = Part.objects.available().filter(aircraft_type=aircraft_type)
+        if cursor is not None:
+            created_at, part_id = cursor
+            available_parts = available_parts.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=part_id))
+        
+        # Oldest parts first, limit + 1 per type to know whether there is more
+        queries = [
+            available_parts.filter(part_type=part_type).annotate(
+                team_name=F('team__name'),
+                creator_name=F('creator__username'),
+            ).values('id', 'part_type', 'team_name', 'creator_name', 'created_at').order_by('created_at', 'id')[:limit + 1]
+            for part_type, _ in part_types
+        ]
+        if len(queries) > 1 and connection.features.supports_slicing_ordering_in_compound:
+            rows = queries[0].union(*queries[1:], all=True)
+        else:
+            # SQLite can't limit the parts of a compound query, read the types one by one
+            rows = [row for query in queries for row in query]
         
         # Group by part type
-        parts_by_type = {}
-        for part_type, name in PART_TYPES:
-            parts = available_parts.filter(part_type=part_type)
-            parts_data = []
-            
-            for part in parts:
-                parts_data.append({
-                    'id': part.id,
-                    'team': part.team.name if part.team else None,
-                    'creator': part.creator.username if part.creator else None,
-                    'created_at': part.created_at.strftime('%d.%m.%Y %H:%M')
-                })
-            
-            parts_by_type[part_type] = {
-                'name': name,
-                'parts': parts_data,
-                'count': len(parts_data)
-            }
+        parts_by_type = {part_type: {'name': name, 'parts': [], 'count': counts.get(part_type, 0), 'next': None}
+                         for part_type, name in part_types}
+        for row in rows:
+            parts_by_type[row['part_type']]['parts'].append(row)
+        
+        for part_type, group in parts_by_type.items():
+            # UNION ALL doesn't keep the order of its parts
+            rows = sorted(group['parts'], key=lambda row: (row['created_at'], row['id']))
+            if len(rows) > limit:
+                rows = rows[:limit]
+                group['next'] = KeysetPagination().encode_cursor((rows[-1]['created_at'], rows[-1]['id']))
+            group['parts'] = [{
+                'id': row['id'],
+                'team': row['team_name'],
+                'creator': row['creator_name'],
+                'created_at': row['created_at'].strftime('%d.%m.%Y %H:%M')
+            } for row in rows]
         
         return Response(parts_by_type)
 
 
-class CompletedAircraftViewSet(viewsets.ReadOnlyModelViewSet):
-    """ViewSet for completed aircraft"""
+class ProductionAnalyticsView(APIView):
+    """
+    Production reports aggregated in the database, one grouped query per report:
+    aircraft completed, parts produced per team and assembly lead time, per day or week.
+    Results are cached for a minute per report and range
+    """
+    permission_classes = [permissions.IsAuthenticated, IsAssemblyTeamMember]
+    
+    """Get one report for the requested period and date range"""
+    def get(self, request, report):
+        if report not in REPORTS:
+            return Response({"error": "Unknown report"}, status=status.HTTP_404_NOT_FOUND)
+        
+        serializer = AnalyticsQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+        
+        return Response({
+            "report": report,
+            "period": params['period'],
+            "date_from": params['date_from'],
+            "date_to": params['date_to'],
+            "rows": get_report(report, params['period'], params['date_from'], params['date_to']),
+        })
+
+
+class CompletedAircraftViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    ViewSet for completed aircraft.
+    The list is one annotated, paginated query, ?include_parts=1 nests the parts with one prefetch
+    """
     serializer_class = AircraftDetailSerializer
     permission_classes = [IsAssemblyTeamMember]
+    pagination_class = AircraftPagination
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    filterset_fields = ['aircraft_type']
+    ordering_fields = ['id', 'aircraft_type', 'assembled_at', 'parts_count']
+    ordering = ['-assembled_at', '-id']
     
     """Get all aircraft that have all required parts"""
     def get_queryset(self):
-        return Aircraft.objects.all().order_by('-id')
-        
-    """List method to add formatted data to each item"""
-    def list(self, request, *args, **kwargs):
-        queryset = self.get_queryset()
-        serializer = self.get_serializer(queryset, many=True)
-        data = serializer.data
-        
-        # Add explicit display values to each item
-        for item in data:
-            aircraft = Aircraft.objects.get(id=item['id'])
-            item['get_aircraft_type_display'] = aircraft.get_aircraft_type_display()
-            item['aircraft_type_display'] = aircraft.get_aircraft_type_display()
-            
-            # Format dates
-            if item['assembled_at']:
-                item['assembled_at'] = aircraft.assembled_at.strftime('%d.%m.%Y %H:%M')
-                
-            # Add parts count
-            item['parts_count'] = aircraft.part_set.count()
+        queryset = Aircraft.objects.all().order_by('-assembled_at', '-id')
+        parts = Prefetch('part_set', queryset=Part.objects.select_related('creator', 'team').order_by('id'))
+        if self.action == 'list':
+            queryset = queryset.annotate(parts_count=Count('part'))
+            if self.include_parts():
+                queryset = queryset.prefetch_related(parts)
+            return queryset
+        return queryset.prefetch_related(parts)
+    
+    """
+    Validators only need the filtered aircraft rows. Ordering is skipped: it does not change
+    the aggregate and may name the parts_count annotation this queryset does not have
+    """
+    def get_conditional_queryset(self):
+        if self.action == 'list':
+            queryset = Aircraft.objects.all()
+            for backend in self.filter_backends:
+                if backend is not filters.OrderingFilter:
+                    queryset = backend().filter_queryset(self.request, queryset, self)
+            return queryset
+        return super().get_conditional_queryset()
+    
+    def include_parts(self):
+        return self.request.query_params.get('include_parts') in ('1', 'true')
+    
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return AircraftListSerializer
+        return AircraftDetailSerializer
+    
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['include_parts'] = self.include_parts()
+        return context
 
-        return Response(data)
+
+async def assembly_events_view(request):
+    """
+    Server-Sent Events stream of assembly and inventory changes.
+    ?assembly=<id> adds that assembly's events to the inventory events every page gets.
+    Needs an ASGI server so an open stream does not hold a worker thread, under WSGI (runserver,
+    sync gunicorn) it answers 501 and the pages keep working without live updates
+    """
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({"error": "The event stream is only available on the ASGI server"}, status=501)
+    
+    user = await request.auser()
+    if not user.is_authenticated or not user.team_id or not user.team.is_assembly:
+        return JsonResponse({"error": "You must be a member of the assembly team to perform this action."}, status=403)
+    
+    channels = [INVENTORY_CHANNEL]
+    assembly_id = request.GET.get('assembly')
+    if assembly_id:
+        if not assembly_id.isdigit():
+            return JsonResponse({"error": "Invalid assembly id"}, status=400)
+        channels.append(assembly_channel(int(assembly_id)))
+    
+    broker = get_broker()
+    queue = broker.subscribe(channels)
+    
+    async def stream():
+        try:
+            yield f"retry: {EVENTS_RETRY_MS}\n\n"
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), timeout=EVENTS_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    # Comment line keeps proxies from closing an idle stream
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: {message['event']}\ndata: {json.dumps(message['data'])}\n\n"
+        finally:
+            broker.unsubscribe(channels, queue)
+    
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Tell nginx not to buffer the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
 
 
 # Template Views
 def assembly_list_view(request):
     """View for listing assembly processes and completed aircraft"""
-    if not request.user.is_authenticated or not request.user.team or request.user.team.team_type != 'assembly':
+    if not request.user.is_authenticated or not request.user.team_id or not request.user.team.is_assembly:
         return render(request, '403.html', {'message': 'You must be a member of the assembly team to access this page.'})
     
     assemblies = AssemblyProcess.objects.all().order_by('-start_date')
@@ -474,73 +682,13 @@ def assembly_list_view(request):
 
 def assembly_detail_view(request, pk):
     """View for assembly detail with interactive skeleton"""
-    if not request.user.is_authenticated or not request.user.team or request.user.team.team_type != 'assembly':
+    if not request.user.is_authenticated or not request.user.team_id or not request.user.team.is_assembly:
         return render(request, '403.html', {'message': 'You must be a member of the assembly team to access this page.'})
     
-    assembly = get_object_or_404(AssemblyProcess, pk=pk)
-    
-    # Prepare context with the assembly data
-    serializer = AssemblyProcessSerializer(assembly)
-    assembly_data = serializer.data
-    
-    # Add explicit display values to ensure they are available in the template
-    assembly_data['get_status_display'] = assembly.get_status_display()
-    assembly_data['get_aircraft_type_display'] = assembly.get_aircraft_type_display()
-    
-    # Add user information explicitly
-    if assembly.started_by:
-        assembly_data['started_by'] = {
-            'username': assembly.started_by.username,
-            'id': assembly.started_by.id
-        }
-    
-    if assembly.completed_by:
-        assembly_data['completed_by'] = {
-            'username': assembly.completed_by.username,
-            'id': assembly.completed_by.id
-        }
-    
-    # Format dates properly
-    if assembly.start_date:
-        assembly_data['start_date'] = assembly.start_date.strftime('%d.%m.%Y %H:%M')
-    
-    if assembly.completion_date:
-        assembly_data['completion_date'] = assembly.completion_date.strftime('%d.%m.%Y %H:%M')
-    
-    # Add the logs in reverse chronological order (most recent first)
-    logs = assembly.assemblylog_set.all().order_by('-timestamp')
-    log_data = []
-    
-    for log in logs:
-        log_entry = {
-            'action': log.action,
-            'action_display': log.get_action_display(),
-            'timestamp': log.timestamp.strftime('%d.%m.%Y %H:%M'),
-            'notes': log.notes,
-        }
-        
-        # Add action_by information
-        if log.action_by:
-            log_entry['action_by'] = {
-                'username': log.action_by.username,
-                'id': log.action_by.id
-            }
-        else:
-            log_entry['action_by'] = {
-                'username': 'Bilinmeyen Kullanıcı'
-            }
-        
-        # Add part information if available
-        if log.part:
-            log_entry['part'] = {
-                'id': log.part.id,
-                'part_type': log.part.part_type,
-                'part_type_display': log.part.get_part_type_display()
-            }
-        
-        log_data.append(log_entry)
+    assembly = get_object_or_404(AssemblyProcess.objects.only('id'), pk=pk)
     
-    assembly_data['logs'] = log_data
+    # Same cached payload as the detail API
+    assembly_data = get_assembly_payload(assembly.pk)
     
     context = {
         'assembly': assembly_data
@@ -550,10 +698,15 @@ def assembly_detail_view(request, pk):
 
 def aircraft_detail_view(request, pk):
     """View for completed aircraft detail"""
-    if not request.user.is_authenticated or not request.user.team or request.user.team.team_type != 'assembly':
+    if not request.user.is_authenticated or not request.user.team_id or not request.user.team.is_assembly:
         return render(request, '403.html', {'message': 'You must be a member of the assembly team to access this page.'})
     
-    aircraft = get_object_or_404(Aircraft, pk=pk)
+    aircraft = get_object_or_404(
+        Aircraft.objects.prefetch_related(
+            Prefetch('part_set', queryset=Part.objects.select_related('creator', 'team').order_by('id'))
+        ),
+        pk=pk
+    )
     
     # Prepare context with the aircraft data
     serializer = AircraftDetailSerializer(aircraft)
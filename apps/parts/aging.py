@@ -0,0 +1,83 @@
+from datetime import timedelta
+
+from django.db.models import Case, Count, F, IntegerField, Value, When, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+
+# Upper edges of the age buckets in days, the last bucket is open ended
+AGE_BUCKETS = (7, 30, 90, 180, 365)
+
+GROUP_FIELDS = ('aircraft_type', 'part_type', 'team_id')
+
+
+def bucket_labels():
+    edges = (0,) + AGE_BUCKETS
+    labels = [f'{low}-{high}' for low, high in zip(edges, edges[1:])]
+    return labels + [f'{AGE_BUCKETS[-1]}+']
+
+
+def age_bucket(now):
+    """
+    Bucket number of a part's age, computed by the database from created_at.
+    Comparing created_at with fixed cutoffs (rather than bucketing the age) keeps it portable,
+    the same result as width_bucket over the age
+    """
+    return Case(
+        *[When(created_at__gt=now - timedelta(days=days), then=Value(index))
+          for index, days in enumerate(AGE_BUCKETS)],
+        default=Value(len(AGE_BUCKETS)),
+        output_field=IntegerField(),
+    )
+
+
+def aging_report(queryset, oldest=5):
+    """
+    Age histograms of the given parts per (aircraft_type, part_type, team) and the `oldest` parts of each group.
+    One grouped query for the histograms and one windowed query for the oldest parts, only the
+    counts and the oldest rows leave the database
+    """
+    now = timezone.now()
+    labels = bucket_labels()
+    queryset = queryset.order_by()
+
+    groups = {}
+    rows = queryset.annotate(bucket=age_bucket(now), team_name=F('team__name')).values(
+        *GROUP_FIELDS, 'team_name', 'bucket'
+    ).annotate(count=Count('id')).order_by(*GROUP_FIELDS, 'bucket')
+    for row in rows:
+        key = tuple(row[field] for field in GROUP_FIELDS)
+        if key not in groups:
+            groups[key] = {
+                'aircraft_type': row['aircraft_type'],
+                'part_type': row['part_type'],
+                'team_id': row['team_id'],
+                'team_name': row['team_name'],
+                'total': 0,
+                'histogram': [{'bucket': label, 'count': 0} for label in labels],
+                'oldest': [],
+            }
+        groups[key]['histogram'][row['bucket']]['count'] = row['count']
+        groups[key]['total'] += row['count']
+
+    if oldest:
+        parts = queryset.annotate(
+            position=Window(
+                RowNumber(),
+                partition_by=[F(field) for field in GROUP_FIELDS],
+                order_by=[F('created_at').asc(), F('id').asc()],
+            ),
+        ).filter(position__lte=oldest).order_by(*GROUP_FIELDS, 'position').values(
+            'id', 'created_at', *GROUP_FIELDS
+        )
+        for part in parts:
+            group = groups.get(tuple(part[field] for field in GROUP_FIELDS))
+            if group is None:
+                # The group appeared after the histogram query ran, it shows up on the next request
+                continue
+            group['oldest'].append({
+                'id': part['id'],
+                'created_at': part['created_at'],
+                'age_days': (now - part['created_at']).days,
+            })
+
+    return list(groups.values())
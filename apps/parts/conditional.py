@@ -0,0 +1,94 @@
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+
+class NotModified(Exception):
+    """Carries the 304/412 response out of initial() before the handler runs"""
+    def __init__(self, response):
+        super().__init__()
+        self.response = response
+
+
+class ConditionalGetMixin:
+    """
+    ETag / Last-Modified support for the list and retrieve actions of a viewset.
+    Validators come from one aggregate (max updated_at + row count) over the same queryset
+    the action would serialize, so an unchanged resource is answered with 304 before any
+    serialization happens. Works with viewsets that override list()/retrieve().
+    The full URL is part of the ETag, including the DataTables `draw` counter that is echoed in
+    the body. A 304 can't carry a new draw value and DataTables drops replies with an old one,
+    so the grids send a new draw with every request and never get a 304. Only plain API
+    clients that repeat the same URL benefit
+    """
+    conditional_field = 'updated_at'
+    conditional_actions = ('list', 'retrieve')
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.validators = None
+
+        if request.method not in ('GET', 'HEAD') or self.action not in self.conditional_actions:
+            return
+
+        self.validators = self.get_validators(request)
+        if self.validators is None:
+            return
+
+        etag, last_modified = self.validators
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is not None:
+            response['ETag'] = etag
+            raise NotModified(response)
+
+    """Queryset the validators are aggregated over, override to drop costly annotations"""
+    def get_conditional_queryset(self):
+        return self.filter_queryset(self.get_queryset())
+
+    def get_validators(self, request):
+        queryset = self.get_conditional_queryset()
+        if self.action == 'retrieve':
+            lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+            queryset = queryset.filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+
+        stats = queryset.order_by().aggregate(
+            last_modified=Max(self.conditional_field),
+            count=Count('pk'),
+        )
+        if stats['last_modified'] is None:
+            # Empty lists still get an ETag, missing objects are left to the 404 path
+            if self.action == 'retrieve':
+                return None
+            timestamp = None
+        else:
+            timestamp = int(stats['last_modified'].timestamp())
+
+        # Same data rendered for another URL, user scope or format is a different representation
+        key = '|'.join([
+            request.get_full_path(),
+            str(getattr(request.user, 'team_id', '')),
+            request.accepted_renderer.format,
+            str(stats['last_modified']),
+            str(stats['count']),
+        ])
+        etag = 'W/"%s"' % hashlib.md5(key.encode()).hexdigest()
+        return etag, timestamp
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return exc.response
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        validators = getattr(self, 'validators', None)
+        if validators and response.status_code == 200:
+            etag, last_modified = validators
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+            # Let clients keep the body but always revalidate it
+            patch_cache_control(response, private=True, no_cache=True)
+        return response
@@ -0,0 +1,93 @@
+import csv
+import json
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F
+
+# Columns of the inventory export, in output order
+EXPORT_FIELDS = [
+    'id', 'part_type', 'aircraft_type', 'team', 'creator', 'created_at',
+    'is_recycled', 'aircraft_id', 'aircraft_type_used', 'assembly_id', 'assembly_status',
+]
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+class Echo:
+    """File-like object whose write() hands the line back instead of buffering it"""
+    def write(self, value):
+        return value
+
+
+def export_rows(queryset, chunk_size=2000):
+    """
+    Flatten parts into plain dicts with one joined query.
+    iterator() streams through a server-side cursor so only one chunk is held in memory
+    """
+    rows = queryset.select_related(None).annotate(
+        team_label=F('team__name'),
+        creator_label=F('creator__username'),
+        aircraft_type_used=F('used_in_aircraft__aircraft_type'),
+        assembly_id=F('assemblypart__assembly_id'),
+        assembly_status=F('assemblypart__assembly__status'),
+    ).values(
+        'id', 'part_type', 'aircraft_type', 'team_label', 'creator_label', 'created_at',
+        'is_recycled', 'used_in_aircraft_id', 'aircraft_type_used', 'assembly_id', 'assembly_status',
+    )
+
+    for row in rows.iterator(chunk_size=chunk_size):
+        yield {
+            'id': row['id'],
+            'part_type': row['part_type'],
+            'aircraft_type': row['aircraft_type'],
+            'team': row['team_label'],
+            'creator': row['creator_label'],
+            'created_at': row['created_at'],
+            'is_recycled': row['is_recycled'],
+            'aircraft_id': row['used_in_aircraft_id'],
+            'aircraft_type_used': row['aircraft_type_used'],
+            'assembly_id': row['assembly_id'],
+            'assembly_status': row['assembly_status'],
+        }
+
+
+def stream_csv(rows):
+    writer = csv.DictWriter(Echo(), fieldnames=EXPORT_FIELDS)
+    yield writer.writeheader()
+    for row in rows:
+        created_at = row['created_at']
+        yield writer.writerow({**row, 'created_at': created_at.isoformat() if created_at else ''})
+
+
+def stream_ndjson(rows):
+    for row in rows:
+        yield json.dumps(row, cls=DjangoJSONEncoder) + '\n'
+
+
+STREAMERS = {
+    'csv': stream_csv,
+    'ndjson': stream_ndjson,
+}
+
+
+def stream_async(lines, chunk_size=2000):
+    """
+    Async body for ASGI servers, which buffer a sync streaming body into a list before sending it.
+    Lines are pulled chunk_size at a time on the request's sync thread, where the server-side cursor lives
+    """
+    next_chunk = sync_to_async(lambda: list(islice(lines, chunk_size)), thread_sensitive=True)
+
+    async def stream():
+        try:
+            while chunk := await next_chunk():
+                yield ''.join(chunk)
+        finally:
+            await sync_to_async(lines.close, thread_sensitive=True)()
+
+    return stream()
@@ -0,0 +1,140 @@
+import hashlib
+import json
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import IdempotencyRecord
+
+HEADER = 'HTTP_IDEMPOTENCY_KEY'
+KEY_MAX_LENGTH = 255
+
+# A pending record older than this belongs to a worker that died mid-request, the key can be reclaimed
+PENDING_TIMEOUT = timedelta(minutes=5)
+
+# Outcomes a retry should get to run again instead of replaying: lost lock races and server errors
+RETRYABLE_STATUSES = {status.HTTP_409_CONFLICT, status.HTTP_429_TOO_MANY_REQUESTS}
+
+
+def get_ttl():
+    return timedelta(seconds=getattr(settings, 'IDEMPOTENCY_KEY_TTL', 60 * 60 * 24))
+
+
+class UploadEncoder(DjangoJSONEncoder):
+    """Uploaded files take part in the hash by name, size and content digest"""
+    def default(self, o):
+        if isinstance(o, UploadedFile):
+            digest = hashlib.sha256()
+            for chunk in o.chunks():
+                digest.update(chunk)
+            o.seek(0)
+            return f'{o.name}:{o.size}:{digest.hexdigest()}'
+        return super().default(o)
+
+
+def request_hash(request):
+    """Fingerprint of what the request asks for, the same key sent with another body is an error"""
+    data = request.data
+    if hasattr(data, 'lists'):
+        data = dict(data.lists())
+        data.update({name: request.FILES.getlist(name) for name in request.FILES})
+    body = json.dumps(data, sort_keys=True, cls=UploadEncoder)
+    return hashlib.sha256(f'{request.method} {request.path}\n{body}'.encode()).hexdigest()
+
+
+def claim(key, user, fingerprint):
+    """
+    Return the live record of the key, or insert a pending one and return None.
+    The insert commits on its own so concurrent retries of the same key see it immediately
+    """
+    now = timezone.now()
+    for _ in range(2):
+        record = IdempotencyRecord.objects.filter(key=key, user=user).first()
+        if record is not None:
+            stale = record.status_code is None and record.created_at < now - PENDING_TIMEOUT
+            if record.expires_at > now and not stale:
+                return record
+            # Expired or abandoned: drop it (only if nobody else replaced it meanwhile) and claim again
+            IdempotencyRecord.objects.filter(pk=record.pk, created_at=record.created_at).delete()
+
+        try:
+            with transaction.atomic():
+                IdempotencyRecord.objects.create(
+                    key=key, user=user, request_hash=fingerprint, expires_at=now + get_ttl()
+                )
+            return None
+        except IntegrityError:
+            # A concurrent request with the same key won the insert, read its record
+            continue
+    return None
+
+
+def replay(record, fingerprint):
+    if record.request_hash != fingerprint:
+        return Response(
+            {"error": "This Idempotency-Key was already used with a different request"},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY
+        )
+    if record.status_code is None:
+        return Response(
+            {"error": "A request with this Idempotency-Key is still being processed"},
+            status=status.HTTP_409_CONFLICT
+        )
+    response = Response(record.response_body, status=record.status_code)
+    response['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def store_response(records, response):
+    records.update(status_code=response.status_code, response_body=response.data)
+
+
+def idempotent(handler):
+    """
+    Let a POST handler be retried safely with an Idempotency-Key header.
+    The first request with a key runs the handler and stores its status and body,
+    a retry with the same key and body gets the stored response without running it again.
+    Requests without the header are not affected
+    """
+    @wraps(handler)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.META.get(HEADER)
+        if not key:
+            return handler(self, request, *args, **kwargs)
+        if len(key) > KEY_MAX_LENGTH:
+            return Response(
+                {"error": f"Idempotency-Key can be at most {KEY_MAX_LENGTH} characters"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        user = request.user if request.user.is_authenticated else None
+        fingerprint = request_hash(request)
+        record = claim(key, user, fingerprint)
+        if record is not None:
+            return replay(record, fingerprint)
+
+        records = IdempotencyRecord.objects.filter(key=key, user=user, status_code__isnull=True)
+        try:
+            # The response is stored in the handler's own transaction: either both the side effects
+            # and the replayable response are committed, or neither is and the key can run again
+            with transaction.atomic():
+                response = handler(self, request, *args, **kwargs)
+                retryable = response.status_code >= 500 or response.status_code in RETRYABLE_STATUSES
+                if not retryable:
+                    store_response(records, response)
+        except Exception:
+            records.delete()
+            raise
+
+        if retryable:
+            records.delete()
+        return response
+
+    return wrapper
@@ -0,0 +1,34 @@
+from django.db import IntegrityError, OperationalError
+from rest_framework import status
+from rest_framework.response import Response
+
+# PostgreSQL "lock_not_available", raised when a NOWAIT row lock is held by another transaction
+LOCK_NOT_AVAILABLE = '55P03'
+# PostgreSQL "unique_violation"
+UNIQUE_VIOLATION = '23505'
+
+# Lock order shared by every allocation path so concurrent requests can't deadlock:
+#   1. the assembly process row
+#   2. part rows, ascending id
+#   3. stock ledger rows, sorted by (aircraft_type, part_type) (see stock.move_stock_counts)
+
+
+def is_lock_conflict(exc):
+    """
+    True when a database error means another request got to the same rows first:
+    a refused NOWAIT lock, or a part's one-assembly unique constraint lost to a concurrent insert.
+    Every other error (NOT NULL, foreign keys, other unique constraints) is a bug and not retryable
+    """
+    pgcode = getattr(exc.__cause__, 'pgcode', None)
+    if isinstance(exc, IntegrityError):
+        # Import here to avoid circular import
+        from apps.assembly.models import AssemblyPart
+        diag = getattr(exc.__cause__, 'diag', None)
+        return pgcode == UNIQUE_VIOLATION and getattr(diag, 'table_name', None) == AssemblyPart._meta.db_table
+    if isinstance(exc, OperationalError):
+        return pgcode == LOCK_NOT_AVAILABLE
+    return False
+
+
+def conflict_response(message="These parts are being used by another request, please try again"):
+    return Response({"error": message}, status=status.HTTP_409_CONFLICT)
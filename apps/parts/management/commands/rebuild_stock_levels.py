@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from apps.parts.stock import rebuild_stock, stock_drift
+
+
+class Command(BaseCommand):
+    help = "Recount part stock levels from scratch, or report drift with --verify"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help="Only compare the ledger with a fresh count, exit with an error if they differ",
+        )
+
+    def handle(self, *args, **options):
+        drift = stock_drift()
+
+        for (aircraft_type, part_type), columns in drift.items():
+            for state, (recorded, counted) in columns.items():
+                self.stdout.write(
+                    f"{aircraft_type} {part_type} {state}: ledger={recorded} actual={counted}"
+                )
+
+        if options['verify']:
+            if drift:
+                raise CommandError(f"Stock ledger drifted for {len(drift)} part type(s).")
+            self.stdout.write(self.style.SUCCESS("Stock ledger matches the parts table."))
+            return
+
+        with transaction.atomic():
+            rows = rebuild_stock()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rows} stock level row(s)."))
@@ -0,0 +1,33 @@
+# Generated by Django 5.2 on 2026-10-18 04:22
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('parts', '0001_initial'),
+        ('planes', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='part',
+            index=models.Index(condition=models.Q(('is_recycled', False), ('used_in_aircraft__isnull', True)), fields=['aircraft_type', 'part_type', 'created_at'], name='part_available_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='part',
+            index=models.Index(fields=['aircraft_type', 'part_type', 'is_recycled'], name='part_type_filter_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='part',
+            index=models.Index(fields=['team', 'created_at'], name='part_team_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='part',
+            index=models.Index(fields=['created_at', 'id'], name='part_created_idx'),
+        ),
+    ]
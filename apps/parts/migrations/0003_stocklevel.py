@@ -0,0 +1,47 @@
+# Generated by Django 5.2 on 2026-10-18 04:24
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def seed_stock_levels(apps, schema_editor):
+    """Count existing parts into the new ledger"""
+    Part = apps.get_model('parts', 'Part')
+    StockLevel = apps.get_model('parts', 'StockLevel')
+
+    in_stock = Q(is_recycled=False, used_in_aircraft__isnull=True)
+    rows = Part.objects.order_by().values('aircraft_type', 'part_type').annotate(
+        available=Count('id', filter=in_stock & Q(assemblypart__isnull=True)),
+        in_assembly=Count('id', filter=in_stock & Q(assemblypart__isnull=False)),
+        used=Count('id', filter=Q(is_recycled=False, used_in_aircraft__isnull=False)),
+        recycled=Count('id', filter=Q(is_recycled=True)),
+    )
+    StockLevel.objects.bulk_create([StockLevel(**row) for row in rows])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('parts', '0002_part_indexes'),
+        ('assembly', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockLevel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('aircraft_type', models.CharField(choices=[('TB2', 'TB2'), ('TB3', 'TB3'), ('AKINCI', 'AKINCI'), ('KIZILELMA', 'KIZILELMA')], max_length=50)),
+                ('part_type', models.CharField(choices=[('wing', 'Kanat'), ('body', 'Gövde'), ('tail', 'Kuyruk'), ('avionics', 'Aviyonik')], max_length=50)),
+                ('available', models.IntegerField(default=0)),
+                ('in_assembly', models.IntegerField(default=0)),
+                ('used', models.IntegerField(default=0)),
+                ('recycled', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'unique_together': {('aircraft_type', 'part_type')},
+            },
+        ),
+        migrations.RunPython(seed_stock_levels, migrations.RunPython.noop),
+    ]
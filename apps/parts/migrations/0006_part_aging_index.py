@@ -0,0 +1,21 @@
+# Generated by Django 5.2 on 2026-10-18 05:08
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_trigram_search_indexes'),
+        ('parts', '0005_idempotencyrecord'),
+        ('planes', '0003_aircraft_assembled_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='part',
+            index=models.Index(condition=models.Q(('is_recycled', False), ('used_in_aircraft__isnull', True)), fields=['aircraft_type', 'part_type', 'team', 'created_at'], name='part_aging_idx'),
+        ),
+    ]
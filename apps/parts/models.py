@@ -1,7 +1,9 @@
 from django.db import models
+from django.db.models import Exists, OuterRef, Q
 from apps.accounts.models import Team, User
 from apps.planes.models import AIRCRAFT_TYPES
 from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
 
 # Create your models here.
 
@@ -12,21 +14,67 @@ PART_TYPES = (
     ('avionics', 'Aviyonik'),
 )
 
+class PartQuerySet(models.QuerySet):
+    """Annotate assembly usage so list views don't query it per row"""
+    def with_usage(self):
+        # Import here to avoid circular import
+        from apps.assembly.models import AssemblyPart
+        return self.annotate(
+            in_assembly=Exists(AssemblyPart.objects.filter(part=OuterRef('pk')))
+        )
+
+    """Parts still on the shelf: not recycled, not in an aircraft and not reserved by an assembly"""
+    def available(self):
+        # Import here to avoid circular import
+        from apps.assembly.models import AssemblyPart
+        return self.filter(
+            ~Exists(AssemblyPart.objects.filter(part=OuterRef('pk'))),
+            used_in_aircraft__isnull=True,
+            is_recycled=False,
+        )
+
+
 class Part(models.Model):
     part_type = models.CharField(max_length=50, choices=PART_TYPES)
     aircraft_type = models.CharField(max_length=50, choices=AIRCRAFT_TYPES, default='TB2')
     team = models.ForeignKey(Team, on_delete=models.CASCADE)
     creator = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
     used_in_aircraft = models.ForeignKey('planes.Aircraft', on_delete=models.SET_NULL, null=True, blank=True)
     is_recycled = models.BooleanField(default=False)
 
+    objects = PartQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Parts still on the shelf, in the order the assembly picker reads them
+            models.Index(
+                fields=['aircraft_type', 'part_type', 'created_at'],
+                name='part_available_idx',
+                condition=Q(used_in_aircraft__isnull=True, is_recycled=False),
+            ),
+            # Aging report groups shelf parts by team and reads the oldest of each group in order
+            models.Index(
+                fields=['aircraft_type', 'part_type', 'team', 'created_at'],
+                name='part_aging_idx',
+                condition=Q(used_in_aircraft__isnull=True, is_recycled=False),
+            ),
+            models.Index(fields=['aircraft_type', 'part_type', 'is_recycled'], name='part_type_filter_idx'),
+            models.Index(fields=['team', 'created_at'], name='part_team_created_idx'),
+            models.Index(fields=['created_at', 'id'], name='part_created_idx'),
+        ]
+
     def __str__(self):
         return f"{self.get_part_type_display()} - {self.get_aircraft_type_display()} - {self.id}"
     
     @property
     def is_in_assembly(self):
         """Check if this part is assigned to an assembly process"""
+        # Reuse the with_usage() annotation when the part was loaded with it
+        if hasattr(self, 'in_assembly'):
+            return self.in_assembly
+        
         # Import here to avoid circular import
         from apps.assembly.models import AssemblyPart
         return AssemblyPart.objects.filter(part=self).exists()
@@ -34,11 +82,56 @@ class Part(models.Model):
     @property
     def is_in_use(self):
         """Check if this part is either in an aircraft or assigned to an assembly"""
-        return self.used_in_aircraft is not None or self.is_in_assembly
+        return self.used_in_aircraft_id is not None or self.is_in_assembly
     
     def clean(self):
         """Validate that a part cannot be recycled if it's in use"""
         if self.is_recycled and self.is_in_use:
             raise ValidationError("Cannot recycle a part that is in use")
         
-        return super().clean()
\ No newline at end of file
+        return super().clean()
+
+
+STOCK_STATES = ('available', 'in_assembly', 'used', 'recycled')
+
+class StockLevel(models.Model):
+    """
+    Running part counts per aircraft type and part type.
+    Kept in step with part state changes by apps.parts.stock, rebuilt by the rebuild_stock_levels command
+    """
+    aircraft_type = models.CharField(max_length=50, choices=AIRCRAFT_TYPES)
+    part_type = models.CharField(max_length=50, choices=PART_TYPES)
+    available = models.IntegerField(default=0)
+    in_assembly = models.IntegerField(default=0)
+    used = models.IntegerField(default=0)
+    recycled = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('aircraft_type', 'part_type')
+
+    def __str__(self):
+        return f"{self.get_aircraft_type_display()} - {self.get_part_type_display()}: {self.available}"
+
+
+class IdempotencyRecord(models.Model):
+    """
+    Outcome of a POST sent with an Idempotency-Key header, replayed when the same user retries the key.
+    A row without status_code is a request still running. Rows past expires_at are removed by the
+    purge_idempotency_keys command (or reclaimed when the key is sent again)
+    """
+    key = models.CharField(max_length=255)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
+    request_hash = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='idempotency_user_key_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.key} ({self.status_code or 'pending'})"
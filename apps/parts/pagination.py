@@ -0,0 +1,178 @@
+import base64
+from datetime import datetime
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+def _to_int(value, default):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+class DataTablesPagination(BasePagination):
+    """
+    Offset pagination speaking the DataTables server-side protocol.
+    Reads draw/start/length and answers with draw/recordsTotal/recordsFiltered/data
+    """
+    default_length = 25
+    max_length = 500
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+        self.draw = _to_int(params.get('draw'), 0)
+        self.start = max(_to_int(params.get('start'), 0), 0)
+
+        # DataTables sends length=-1 for "show all", cap it like any other page
+        length = _to_int(params.get('length'), self.default_length)
+        if length <= 0 or length > self.max_length:
+            length = self.max_length
+        self.length = length
+
+        # Offsets are only stable with a unique tie-breaker at the end of the ordering
+        ordering = list(queryset.query.order_by)
+        if not any(isinstance(field, str) and field.lstrip('-') in ('pk', 'id') for field in ordering):
+            queryset = queryset.order_by(*ordering, '-pk')
+
+        page = list(queryset[self.start:self.start + self.length])
+
+        # A short first page already tells us how many rows matched
+        if self.start == 0 and len(page) < self.length:
+            self.records_filtered = len(page)
+        else:
+            self.records_filtered = queryset.count()
+
+        if view is not None and self.is_filtered(request, view):
+            self.records_total = view.get_queryset().count()
+        else:
+            self.records_total = self.records_filtered
+
+        return page
+
+    """Check whether search or field filters narrowed the base queryset"""
+    def is_filtered(self, request, view):
+        params = request.query_params
+        if params.get('search', '').strip():
+            return True
+        filter_fields = getattr(view, 'filterset_fields', None) or []
+        return any(params.get(field) not in (None, '') for field in filter_fields)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'draw': self.draw,
+            'recordsTotal': self.records_total,
+            'recordsFiltered': self.records_filtered,
+            'data': data,
+        })
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (seek) pagination on (keyset_field, id), newest first.
+    Each page is a single index range scan no matter how deep the client goes.
+    The order is fixed by the cursor, an ordering parameter asking for any other order is
+    rejected instead of silently ignored (DataTables requests keep their column ordering)
+    """
+    keyset_field = 'created_at'
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    page_size = 50
+    max_page_size = 500
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.check_ordering(request)
+
+        field = self.keyset_field
+        queryset = queryset.order_by(f'-{field}', '-id')
+        position = self.decode_cursor(request)
+        if position is not None:
+            value, pk = position
+            queryset = queryset.filter(
+                Q(**{f'{field}__lt': value}) | Q(**{field: value, 'id__lt': pk})
+            )
+
+        # Fetch one extra row to know whether there is a next page
+        rows = list(queryset[:self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        self.next_position = (getattr(rows[-1], field), rows[-1].id) if self.has_next else None
+        return rows
+
+    def get_page_size(self, request):
+        size = _to_int(request.query_params.get(self.page_size_query_param), self.page_size)
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def check_ordering(self, request):
+        ordering = request.query_params.get(api_settings.ORDERING_PARAM, '')
+        fields = [field.strip() for field in ordering.split(',') if field.strip()]
+        if fields and fields not in ([f'-{self.keyset_field}'], [f'-{self.keyset_field}', '-id']):
+            raise ValidationError({
+                api_settings.ORDERING_PARAM: f"Cursor pages are ordered by -{self.keyset_field}, -id, "
+                                             f"use the DataTables parameters for other orderings"
+            })
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            raw = base64.urlsafe_b64decode(encoded.encode('ascii')).decode('ascii')
+            value, pk = raw.rsplit('|', 1)
+            return datetime.fromisoformat(value), int(pk)
+        except (TypeError, ValueError, UnicodeError):
+            raise NotFound("Invalid cursor")
+
+    def encode_cursor(self, position):
+        value, pk = position
+        raw = f"{value.isoformat()}|{pk}"
+        return base64.urlsafe_b64encode(raw.encode('ascii')).decode('ascii')
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_position))
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+
+class PartPagination(BasePagination):
+    """
+    Picks a pagination mode from the request:
+    - DataTables requests (draw parameter) get the offset adapter
+    - cursor/page_size requests get keyset pagination
+    - anything else keeps the plain, unpaginated list, or the first keyset page
+      when allow_unpaginated is off
+    """
+    datatables_pagination_class = DataTablesPagination
+    keyset_pagination_class = KeysetPagination
+    allow_unpaginated = True
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+        keyset = self.keyset_pagination_class
+        if 'draw' in params:
+            self.paginator = self.datatables_pagination_class()
+        elif keyset.cursor_query_param in params or keyset.page_size_query_param in params or not self.allow_unpaginated:
+            self.paginator = keyset()
+        else:
+            self.paginator = None
+            return None
+        return self.paginator.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
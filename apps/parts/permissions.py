@@ -7,23 +7,24 @@ class CanManagePart(permissions.BasePermission):
     
     def has_permission(self, request, view):
         # User must be authenticated and have a team
-        if not request.user.is_authenticated or not request.user.team:
+        if not request.user.is_authenticated or not request.user.team_id:
             return False
             
-        # Assembly team members cannot create parts
-        if view.action == 'create' and request.user.team.team_type == 'assembly':
+        # Assembly team members cannot create or batch recycle parts
+        if view.action in ('create', 'bulk_create', 'recycle_batch') and request.user.team.is_assembly:
             return False
             
         return True
         
     def has_object_permission(self, request, view, obj):
         # User must be authenticated and have a team
-        if not request.user.is_authenticated or not request.user.team:
+        if not request.user.is_authenticated or not request.user.team_id:
             return False
             
         # Assembly team can view any part but not modify them
-        if request.user.team.team_type == 'assembly':
+        if request.user.team.is_assembly:
             return request.method in permissions.SAFE_METHODS
             
         # Only the team that created the part can update or delete it
-        return obj.team == request.user.team 
\ No newline at end of file
+        # Compare ids so the part's team row is never loaded
+        return obj.team_id == request.user.team_id 
\ No newline at end of file
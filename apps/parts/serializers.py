@@ -1,7 +1,7 @@
 from rest_framework import serializers
-from .models import Part
+from .models import Part, StockLevel
+from apps.planes.models import AIRCRAFT_TYPES
 from apps.accounts.models import User, Team
-from apps.assembly.models import AssemblyPart
 
 class PartSerializer(serializers.ModelSerializer):
     team_name = serializers.SerializerMethodField()
@@ -34,9 +34,33 @@ class PartSerializer(serializers.ModelSerializer):
         Returns True if the part is either:
         1. Used in a completed aircraft (used_in_aircraft is not None)
         2. Assigned to an in-progress assembly
+        Reads the in_assembly annotation from Part.objects.with_usage() when present
         """
-        if obj.used_in_aircraft:
-            return True
+        in_assembly = getattr(obj, 'in_assembly', None)
+        if in_assembly is None:
+            return obj.is_in_use
         
-        # Check if part is in an assembly (even if not in a completed aircraft)
-        return AssemblyPart.objects.filter(part=obj).exists()
+        return obj.used_in_aircraft_id is not None or in_assembly
+
+
+class PartBulkRowSerializer(serializers.ModelSerializer):
+    """Validates one row of a bulk registration, team and creator come from the request"""
+    class Meta:
+        model = Part
+        fields = ['part_type', 'aircraft_type']
+
+
+class StockLevelSerializer(serializers.ModelSerializer):
+    aircraft_type_display = serializers.CharField(source='get_aircraft_type_display', read_only=True)
+    part_type_display = serializers.CharField(source='get_part_type_display', read_only=True)
+
+    class Meta:
+        model = StockLevel
+        fields = ['aircraft_type', 'aircraft_type_display', 'part_type', 'part_type_display',
+                  'available', 'in_assembly', 'used', 'recycled', 'updated_at']
+
+
+class KitForecastQuerySerializer(serializers.Serializer):
+    """Query parameters of the buildable aircraft forecast"""
+    aircraft_type = serializers.ChoiceField(choices=AIRCRAFT_TYPES, required=False)
+    target = serializers.IntegerField(min_value=1, max_value=100000, required=False)
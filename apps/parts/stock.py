@@ -0,0 +1,149 @@
+from collections import Counter
+
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from apps.accounts.dashboard import invalidate_dashboard
+from apps.accounts.models import TEAM_TO_PART_TYPE
+from apps.parts.models import Part, StockLevel, PART_TYPES, STOCK_STATES
+from apps.planes.models import AIRCRAFT_TYPES
+
+
+def part_state(part):
+    """Returns which stock column a part is counted in"""
+    if part.is_recycled:
+        return 'recycled'
+    if part.used_in_aircraft_id is not None:
+        return 'used'
+    if part.is_in_assembly:
+        return 'in_assembly'
+    return 'available'
+
+
+def move_stock(parts, from_state=None, to_state=None):
+    """
+    Move parts from one stock column to another.
+    from_state=None records new parts, to_state=None records parts that left the inventory.
+    Must run inside the transaction that changes the parts themselves
+    """
+    counts = Counter((part.aircraft_type, part.part_type) for part in parts)
+    move_stock_counts(counts, from_state, to_state)
+
+
+def move_stock_counts(counts, from_state=None, to_state=None):
+    """Same as move_stock, for {(aircraft_type, part_type): count} mappings"""
+    if from_state == to_state:
+        return
+
+    # Update rows in a fixed order so concurrent transactions can't deadlock on them
+    for (aircraft_type, part_type), count in sorted(counts.items()):
+        if not count:
+            continue
+
+        changes = {'updated_at': timezone.now()}
+        if from_state:
+            changes[from_state] = F(from_state) - count
+        if to_state:
+            changes[to_state] = F(to_state) + count
+
+        levels = StockLevel.objects.filter(aircraft_type=aircraft_type, part_type=part_type)
+        if not levels.update(**changes):
+            StockLevel.objects.get_or_create(aircraft_type=aircraft_type, part_type=part_type)
+            levels.update(**changes)
+
+    # Part counts (and aircraft deliveries, which always move parts) are on the home dashboard
+    invalidate_dashboard()
+
+
+def count_stock():
+    """Count every part type from scratch with one grouped query"""
+    in_stock = Q(is_recycled=False, used_in_aircraft__isnull=True)
+    rows = Part.objects.order_by().values('aircraft_type', 'part_type').annotate(
+        available=Count('id', filter=in_stock & Q(assemblypart__isnull=True)),
+        in_assembly=Count('id', filter=in_stock & Q(assemblypart__isnull=False)),
+        used=Count('id', filter=Q(is_recycled=False, used_in_aircraft__isnull=False)),
+        recycled=Count('id', filter=Q(is_recycled=True)),
+    )
+    return {
+        (row['aircraft_type'], row['part_type']): {state: row[state] for state in STOCK_STATES}
+        for row in rows
+    }
+
+
+def stock_drift():
+    """Returns {(aircraft_type, part_type): {state: (ledger, actual)}} for every mismatching column"""
+    actual = count_stock()
+    ledger = {
+        (level.aircraft_type, level.part_type): {state: getattr(level, state) for state in STOCK_STATES}
+        for level in StockLevel.objects.all()
+    }
+
+    empty = dict.fromkeys(STOCK_STATES, 0)
+    drift = {}
+    for key in sorted(set(actual) | set(ledger)):
+        recorded = ledger.get(key, empty)
+        counted = actual.get(key, empty)
+        diff = {
+            state: (recorded[state], counted[state])
+            for state in STOCK_STATES if recorded[state] != counted[state]
+        }
+        if diff:
+            drift[key] = diff
+    return drift
+
+
+def rebuild_stock():
+    """
+    Overwrite the ledger with freshly counted values, returns the number of rows written.
+    Ledger rows are locked first so concurrent moves wait and apply on top of the new counts
+    """
+    list(StockLevel.objects.select_for_update().order_by('aircraft_type', 'part_type'))
+    actual = count_stock()
+    empty = dict.fromkeys(STOCK_STATES, 0)
+
+    keys = set(actual) | set(
+        StockLevel.objects.values_list('aircraft_type', 'part_type')
+    )
+    for aircraft_type, part_type in sorted(keys):
+        StockLevel.objects.update_or_create(
+            aircraft_type=aircraft_type,
+            part_type=part_type,
+            defaults=actual.get((aircraft_type, part_type), empty),
+        )
+    return len(keys)
+
+
+def forecast_kits(aircraft_type=None, target=None):
+    """
+    How many complete kits (one part of every type) each aircraft type can be built from right now,
+    read from the ledger in one query. The part types with the fewest available parts are the bottleneck.
+    With a target quantity, also returns how many parts each producing team type still has to make
+    """
+    levels = StockLevel.objects.all()
+    if aircraft_type:
+        levels = levels.filter(aircraft_type=aircraft_type)
+    available = {}
+    for aircraft, part_type, count in levels.values_list('aircraft_type', 'part_type', 'available'):
+        available.setdefault(aircraft, {})[part_type] = count
+
+    producers = {part_type: team_type for team_type, part_type in TEAM_TO_PART_TYPE.items() if part_type}
+    aircraft_types = [aircraft_type] if aircraft_type else [choice for choice, _ in AIRCRAFT_TYPES]
+
+    forecast = []
+    for aircraft in aircraft_types:
+        counts = {part_type: max(available.get(aircraft, {}).get(part_type, 0), 0) for part_type, _ in PART_TYPES}
+        buildable = min(counts.values())
+        row = {
+            'aircraft_type': aircraft,
+            'buildable': buildable,
+            'bottleneck': [part_type for part_type, count in counts.items() if count == buildable],
+            'available': counts,
+        }
+        if target is not None:
+            row['target'] = target
+            row['shortfall'] = [
+                {'part_type': part_type, 'team_type': producers.get(part_type), 'missing': target - count}
+                for part_type, count in counts.items() if count < target
+            ]
+        forecast.append(row)
+    return forecast
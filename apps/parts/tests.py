@@ -1,13 +1,30 @@
+import json
+from datetime import timedelta
+from urllib.parse import parse_qs, urlparse
+
 from django.test import TestCase
 from django.urls import reverse
 from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.utils import timezone
+from django.db.models.functions import RowNumber
+from django.db import DatabaseError, IntegrityError, OperationalError, connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework.test import APITestCase, APIClient
 from rest_framework import status
 
-from apps.parts.models import Part
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from apps.parts.models import Part, StockLevel, IdempotencyRecord
 from apps.accounts.models import User, Team
+from apps.assembly.models import AssemblyProcess, AssemblyPart
 from apps.parts.serializers import PartSerializer
 from apps.parts.permissions import CanManagePart
+from apps.parts.locking import LOCK_NOT_AVAILABLE, is_lock_conflict
 
 
 class PartModelTests(TestCase):
@@ -187,6 +204,499 @@ class PartAPITests(APITestCase):
         # Verify the part is recycled
         part.refresh_from_db()
         self.assertTrue(part.is_recycled)
+    
+    """Test the list endpoint query count does not grow with the number of parts"""
+    def test_part_list_constant_queries(self):
+        self.client.force_authenticate(user=self.wing_user)
+        
+        def count_list_queries():
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get(self.parts_list_url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            return len(context.captured_queries)
+        
+        Part.objects.create(part_type='wing', aircraft_type='TB2', team=self.wing_team, creator=self.wing_user)
+        baseline = count_list_queries()
+        
+        for _ in range(5):
+            Part.objects.create(part_type='wing', aircraft_type='TB2', team=self.wing_team, creator=self.wing_user)
+        self.assertEqual(count_list_queries(), baseline)
+
+
+class PartBulkCreateTests(APITestCase):
+    """Tests for bulk part registration"""
+    
+    def setUp(self):
+        self.wing_team = Team.objects.create(name='Wing Team', team_type='wing')
+        self.assembly_team = Team.objects.create(name='Assembly Team', team_type='assembly')
+        
+        self.wing_user = User.objects.create_user(
+            username='wing_user',
+            email='wing@example.com',
+            password='password',
+            team=self.wing_team
+        )
+        
+        self.assembler = User.objects.create_user(
+            username='assembler',
+            email='assembler@example.com',
+            password='password',
+            team=self.assembly_team
+        )
+        
+        self.client = APIClient()
+        self.bulk_url = reverse('part-bulk-create')
+    
+    """Test good rows are inserted and bad rows are reported"""
+    def test_bulk_create_json_with_row_errors(self):
+        self.client.force_authenticate(user=self.wing_user)
+        
+        rows = [
+            {'part_type': 'wing', 'aircraft_type': 'TB2'},
+            {'part_type': 'body', 'aircraft_type': 'TB2'},
+            {'part_type': 'wing', 'aircraft_type': 'F16'},
+            {'part_type': 'wing', 'aircraft_type': 'AKINCI'},
+        ]
+        response = self.client.post(self.bulk_url, rows, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['created_count'], 2)
+        self.assertEqual([error['row'] for error in response.data['errors']], [2, 3])
+        
+        parts = Part.objects.filter(id__in=response.data['created_ids'])
+        self.assertEqual(parts.count(), 2)
+        self.assertTrue(all(part.team == self.wing_team and part.creator == self.wing_user for part in parts))
+    
+    """Test parts can be registered from a CSV upload"""
+    def test_bulk_create_csv(self):
+        self.client.force_authenticate(user=self.wing_user)
+        
+        upload = SimpleUploadedFile(
+            'parts.csv',
+            b'part_type,aircraft_type\nwing,TB2\nwing,TB3\nwing,KIZILELMA\n',
+            content_type='text/csv'
+        )
+        response = self.client.post(self.bulk_url, {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['created_count'], 3)
+        self.assertEqual(response.data['errors'], [])
+    
+    """Test assembly team members cannot register parts in bulk"""
+    def test_bulk_create_assembly_forbidden(self):
+        self.client.force_authenticate(user=self.assembler)
+        
+        response = self.client.post(self.bulk_url, [{'part_type': 'wing', 'aircraft_type': 'TB2'}], format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertFalse(Part.objects.exists())
+
+
+class PartExportTests(APITestCase):
+    """Tests for the streaming inventory export"""
+    
+    def setUp(self):
+        self.wing_team = Team.objects.create(name='Wing Team', team_type='wing')
+        self.wing_user = User.objects.create_user(
+            username='wing_user',
+            email='wing@example.com',
+            password='password',
+            team=self.wing_team
+        )
+        
+        self.tb2_part = Part.objects.create(part_type='wing', aircraft_type='TB2', team=self.wing_team, creator=self.wing_user)
+        self.tb3_part = Part.objects.create(part_type='wing', aircraft_type='TB3', team=self.wing_team, creator=self.wing_user)
+        
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.wing_user)
+        self.export_url = reverse('part-export')
+    
+    """Test CSV export streams a header and one line per part"""
+    def test_export_csv(self):
+        response = self.client.get(self.export_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertTrue(lines[0].startswith('id,part_type,aircraft_type,team,creator'))
+        self.assertEqual(len(lines), 3)
+    
+    """Test under ASGI the export body is an async iterator instead of a list built in memory"""
+    async def test_export_csv_asgi(self):
+        await self.async_client.aforce_login(self.wing_user)
+        response = await self.async_client.get(self.export_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.is_async)
+        
+        lines = b''.join([chunk async for chunk in response.streaming_content]).decode().splitlines()
+        self.assertTrue(lines[0].startswith('id,part_type,aircraft_type,team,creator'))
+        self.assertEqual(len(lines), 3)
+    
+    """Test NDJSON export honours the list filters"""
+    def test_export_ndjson_filtered(self):
+        response = self.client.get(self.export_url, {'export_format': 'ndjson', 'aircraft_type': 'TB3'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 1)
+        row = json.loads(lines[0])
+        self.assertEqual(row['id'], self.tb3_part.id)
+        self.assertEqual(row['team'], 'Wing Team')
+        self.assertEqual(row['creator'], 'wing_user')
+        self.assertIsNone(row['assembly_status'])
+
+
+class StockLevelTests(APITestCase):
+    """Tests for the incrementally maintained stock ledger"""
+    
+    def setUp(self):
+        self.wing_team = Team.objects.create(name='Wing Team', team_type='wing')
+        self.wing_user = User.objects.create_user(
+            username='wing_user',
+            email='wing@example.com',
+            password='password',
+            team=self.wing_team
+        )
+        
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.wing_user)
+        self.parts_list_url = reverse('part-list')
+    
+    def get_level(self, aircraft_type='TB2', part_type='wing'):
+        return StockLevel.objects.get(aircraft_type=aircraft_type, part_type=part_type)
+    
+    """Test creating, bulk creating and recycling parts moves ledger counts"""
+    def test_ledger_follows_part_changes(self):
+        response = self.client.post(self.parts_list_url, {'part_type': 'wing', 'aircraft_type': 'TB2'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.client.post(reverse('part-bulk-create'), [{'part_type': 'wing', 'aircraft_type': 'TB2'}] * 3, format='json')
+        self.assertEqual(self.get_level().available, 4)
+        
+        part_detail_url = reverse('part-detail', args=[response.data['id']])
+        self.client.patch(part_detail_url, {'is_recycled': True}, format='json')
+        level = self.get_level()
+        self.assertEqual((level.available, level.recycled), (3, 1))
+        
+        call_command('rebuild_stock_levels', '--verify', stdout=StringIO())
+    
+    """Test the forecast finds the buildable kits, the bottleneck and the shortfall per team"""
+    def test_kit_forecast(self):
+        for part_type, count in (('wing', 3), ('body', 2), ('tail', 2), ('avionics', 5)):
+            team = Team.objects.create(name=f'{part_type} team', team_type=part_type)
+            for _ in range(count):
+                Part.objects.create(part_type=part_type, aircraft_type='TB2', team=team, creator=self.wing_user)
+        call_command('rebuild_stock_levels', stdout=StringIO())
+        
+        forecast_url = reverse('stock-level-forecast')
+        with self.assertNumQueries(1):
+            response = self.client.get(forecast_url, {'aircraft_type': 'TB2', 'target': 4})
+        row, = response.data
+        self.assertEqual(row['buildable'], 2)
+        self.assertEqual(row['bottleneck'], ['body', 'tail'])
+        self.assertEqual(
+            {item['team_type']: item['missing'] for item in row['shortfall']},
+            {'wing': 1, 'body': 2, 'tail': 2}
+        )
+        
+        response = self.client.get(forecast_url)
+        self.assertEqual(len(response.data), 4)
+        self.assertEqual(response.data[1]['buildable'], 0)
+        self.assertNotIn('shortfall', response.data[0])
+        
+        response = self.client.get(forecast_url, {'target': 0})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    """Test the rebuild command detects and repairs drift"""
+    def test_rebuild_command(self):
+        Part.objects.create(part_type='wing', aircraft_type='TB3', team=self.wing_team, creator=self.wing_user)
+        
+        with self.assertRaises(CommandError):
+            call_command('rebuild_stock_levels', '--verify', stdout=StringIO())
+        
+        call_command('rebuild_stock_levels', stdout=StringIO())
+        self.assertEqual(self.get_level(aircraft_type='TB3').available, 1)
+        call_command('rebuild_stock_levels', '--verify', stdout=StringIO())
+    
+    """Test the stock endpoint lists ledger rows"""
+    def test_stock_endpoint(self):
+        self.client.post(self.parts_list_url, {'part_type': 'wing', 'aircraft_type': 'AKINCI'}, format='json')
+        
+        response = self.client.get(reverse('stock-level-list'), {'aircraft_type': 'AKINCI'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 1)
+        self.assertEqual(response.data[0]['available'], 1)
+
+
+class PartSearchTests(APITestCase):
+    """Tests for the part list search box"""
+    
+    def setUp(self):
+        self.wing_team = Team.objects.create(name='Wing Team', team_type='wing')
+        self.assembly_team = Team.objects.create(name='Assembly Team', team_type='assembly')
+        self.other_wing_team = Team.objects.create(name='Night Shift', team_type='wing')
+        
+        self.wing_user = User.objects.create_user(username='wing_user', password='password', team=self.wing_team)
+        self.night_user = User.objects.create_user(username='night_user', password='password', team=self.other_wing_team)
+        self.assembler = User.objects.create_user(username='assembler', password='password', team=self.assembly_team)
+        
+        self.day_part = Part.objects.create(part_type='wing', aircraft_type='TB2', team=self.wing_team, creator=self.wing_user)
+        self.night_part = Part.objects.create(part_type='wing', aircraft_type='TB2', team=self.other_wing_team, creator=self.night_user)
+        
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.assembler)
+        self.parts_list_url = reverse('part-list')
+    
+    """Test numeric terms match the part id exactly"""
+    def test_search_by_id(self):
+        response = self.client.get(self.parts_list_url, {'search': str(self.night_part.id)})
+        self.assertEqual([item['id'] for item in response.data], [self.night_part.id])
+    
+    """Test text terms match team names and creator usernames"""
+    def test_search_related_fields(self):
+        response = self.client.get(self.parts_list_url, {'search': 'night'})
+        self.assertEqual([item['id'] for item in response.data], [self.night_part.id])
+        
+        response = self.client.get(self.parts_list_url, {'search': 'WING_US'})
+        self.assertEqual([item['id'] for item in response.data], [self.day_part.id])
+
+
+class PartConditionalGetTests(APITestCase):
+    """Tests for ETag / Last-Modified handling on the part API"""
+    
+    def setUp(self):
+        self.wing_team = Team.objects.create(name='Wing Team', team_type='wing')
+        self.wing_user = User.objects.create_user(username='wing_user', password='password', team=self.wing_team)
+        self.part = Part.objects.create(part_type='wing', aircraft_type='TB2', team=self.wing_team, creator=self.wing_user)
+        
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.wing_user)
+        self.parts_list_url = reverse('part-list')
+    
+    """Test an unchanged list is answered with 304 and a change invalidates the ETag"""
+    def test_list_not_modified(self):
+        response = self.client.get(self.parts_list_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response['ETag']
+        self.assertIn('Last-Modified', response)
+        
+        response = self.client.get(self.parts_list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        
+        Part.objects.create(part_type='wing', aircraft_type='TB3', team=self.wing_team, creator=self.wing_user)
+        response = self.client.get(self.parts_list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+    
+    """Test a single part is revalidated against its own updated_at"""
+    def test_retrieve_not_modified(self):
+        part_detail_url = reverse('part-detail', args=[self.part.id])
+        etag = self.client.get(part_detail_url)['ETag']
+        
+        response = self.client.get(part_detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        
+        self.client.patch(part_detail_url, {'aircraft_type': 'TB3'}, format='json')
+        response = self.client.get(part_detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+    
+    """Test DataTables requests are never answered with 304, the body echoes their draw counter"""
+    def test_datatables_draw_is_part_of_etag(self):
+        response = self.client.get(self.parts_list_url, {'draw': 1, 'start': 0, 'length': 10})
+        etag = response['ETag']
+        
+        response = self.client.get(self.parts_list_url, {'draw': 2, 'start': 0, 'length': 10}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['draw'], 2)
+
+
+
+
+class PartAgingTests(APITestCase):
+    """Tests for the inventory aging report"""
+    
+    def setUp(self):
+        self.wing_team = Team.objects.create(name='Wing Team', team_type='wing')
+        self.assembly_team = Team.objects.create(name='Assembly Team', team_type='assembly')
+        self.wing_user = User.objects.create_user(username='wing_user', password='password', team=self.wing_team)
+        self.assembler = User.objects.create_user(username='assembler', password='password', team=self.assembly_team)
+        
+        # Ages of 1, 10, 10 and 400 days
+        self.parts = []
+        for days in (1, 10, 10, 400):
+            part = Part.objects.create(part_type='wing', aircraft_type='TB2', team=self.wing_team, creator=self.wing_user)
+            Part.objects.filter(pk=part.pk).update(created_at=timezone.now() - timedelta(days=days))
+            self.parts.append(part)
+        
+        # Parts off the shelf are not counted
+        reserved = Part.objects.create(part_type='wing', aircraft_type='TB2', team=self.wing_team, creator=self.wing_user)
+        assembly = AssemblyProcess.objects.create(aircraft_type='TB2', started_by=self.assembler)
+        AssemblyPart.objects.create(assembly=assembly, part=reserved, added_by=self.assembler)
+        Part.objects.create(part_type='wing', aircraft_type='TB2', team=self.wing_team, creator=self.wing_user, is_recycled=True)
+        
+        self.client = APIClient()
+        self.aging_url = reverse('part-aging')
+    
+    """Test the histogram counts available parts per age bucket and lists the oldest ones"""
+    def test_aging_report(self):
+        self.client.force_authenticate(user=self.assembler)
+        response = self.client.get(self.aging_url, {'oldest': 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['buckets'], ['0-7', '7-30', '30-90', '90-180', '180-365', '365+'])
+        
+        group, = response.data['groups']
+        self.assertEqual(group['team_name'], 'Wing Team')
+        self.assertEqual(group['total'], 4)
+        self.assertEqual([bucket['count'] for bucket in group['histogram']], [1, 2, 0, 0, 0, 1])
+        self.assertEqual([part['id'] for part in group['oldest']], [self.parts[3].id, self.parts[1].id])
+        self.assertEqual(group['oldest'][0]['age_days'], 400)
+        
+        response = self.client.get(self.aging_url, {'aircraft_type': 'TB3'})
+        self.assertEqual(response.data['groups'], [])
+    
+    """Test a group created between the histogram and the oldest-parts query is skipped, not a 500"""
+    def test_aging_report_concurrent_group(self):
+        def create_part_then_number(*args, **kwargs):
+            Part.objects.create(part_type='wing', aircraft_type='TB3', team=self.wing_team, creator=self.wing_user)
+            return RowNumber(*args, **kwargs)
+        
+        self.client.force_authenticate(user=self.assembler)
+        with mock.patch('apps.parts.aging.RowNumber', side_effect=create_part_then_number):
+            response = self.client.get(self.aging_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([group['aircraft_type'] for group in response.data['groups']], ['TB2'])
+    
+    """Test production teams only see the age of their own parts"""
+    def test_aging_report_team_scope(self):
+        body_team = Team.objects.create(name='Body Team', team_type='body')
+        body_user = User.objects.create_user(username='body_user', password='password', team=body_team)
+        
+        self.client.force_authenticate(user=body_user)
+        response = self.client.get(self.aging_url)
+        self.assertEqual(response.data['groups'], [])
+
+class IdempotencyKeyTests(APITestCase):
+    """Tests for replaying POSTs sent with an Idempotency-Key header"""
+    
+    def setUp(self):
+        self.wing_team = Team.objects.create(name='Wing Team', team_type='wing')
+        self.wing_user = User.objects.create_user(username='wing_user', password='password', team=self.wing_team)
+        
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.wing_user)
+        self.parts_list_url = reverse('part-list')
+        self.part_data = {'part_type': 'wing', 'aircraft_type': 'TB2'}
+    
+    """Test a retried create returns the stored response without creating a second part"""
+    def test_replay_create(self):
+        first = self.client.post(self.parts_list_url, self.part_data, format='json', HTTP_IDEMPOTENCY_KEY='abc')
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        
+        # One lookup, the handler doesn't run
+        with self.assertNumQueries(1):
+            retry = self.client.post(self.parts_list_url, self.part_data, format='json', HTTP_IDEMPOTENCY_KEY='abc')
+        self.assertEqual(retry.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry.json(), first.json())
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(Part.objects.count(), 1)
+        
+        # Without a key every request runs
+        self.client.post(self.parts_list_url, self.part_data, format='json')
+        self.assertEqual(Part.objects.count(), 2)
+    
+    """Test the response is stored in the same transaction as the work it replays"""
+    def test_response_stored_with_work(self):
+        with mock.patch('apps.parts.idempotency.store_response', side_effect=DatabaseError("connection lost")):
+            with self.assertRaises(DatabaseError):
+                self.client.post(self.parts_list_url, self.part_data, format='json', HTTP_IDEMPOTENCY_KEY='abc')
+        
+        # Nothing was committed, so the retry runs and is stored this time
+        self.assertFalse(Part.objects.exists())
+        self.assertFalse(IdempotencyRecord.objects.exists())
+        response = self.client.post(self.parts_list_url, self.part_data, format='json', HTTP_IDEMPOTENCY_KEY='abc')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(IdempotencyRecord.objects.get().status_code, status.HTTP_201_CREATED)
+    
+    """Test a key reused with another body is rejected and a key still running is a conflict"""
+    def test_key_mismatch_and_pending(self):
+        self.client.post(self.parts_list_url, self.part_data, format='json', HTTP_IDEMPOTENCY_KEY='abc')
+        response = self.client.post(
+            self.parts_list_url, {'part_type': 'wing', 'aircraft_type': 'TB3'}, format='json', HTTP_IDEMPOTENCY_KEY='abc'
+        )
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        
+        IdempotencyRecord.objects.update(status_code=None, response_body=None)
+        response = self.client.post(self.parts_list_url, self.part_data, format='json', HTTP_IDEMPOTENCY_KEY='abc')
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(Part.objects.count(), 1)
+    
+    """Test rejected requests are not stored and expired keys run again and get purged"""
+    def test_errors_and_expiry(self):
+        response = self.client.post(
+            self.parts_list_url, {'part_type': 'body', 'aircraft_type': 'TB2'}, format='json', HTTP_IDEMPOTENCY_KEY='bad'
+        )
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertFalse(IdempotencyRecord.objects.filter(key='bad').exists())
+        
+        self.client.post(self.parts_list_url, self.part_data, format='json', HTTP_IDEMPOTENCY_KEY='abc')
+        IdempotencyRecord.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        response = self.client.post(self.parts_list_url, self.part_data, format='json', HTTP_IDEMPOTENCY_KEY='abc')
+        self.assertNotIn('Idempotent-Replayed', response)
+        self.assertEqual(Part.objects.count(), 2)
+        
+        IdempotencyRecord.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        out = StringIO()
+        call_command('purge_idempotency_keys', stdout=out)
+        self.assertIn('Deleted 1', out.getvalue())
+        self.assertFalse(IdempotencyRecord.objects.exists())
+
+class PartRecycleTests(APITestCase):
+    """Tests for soft recycling of parts"""
+    
+    def setUp(self):
+        self.wing_team = Team.objects.create(name='Wing Team', team_type='wing')
+        self.body_team = Team.objects.create(name='Body Team', team_type='body')
+        self.wing_user = User.objects.create_user(username='wing_user', password='password', team=self.wing_team)
+        self.body_user = User.objects.create_user(username='body_user', password='password', team=self.body_team)
+        
+        self.parts = [
+            Part.objects.create(part_type='wing', aircraft_type='TB2', team=self.wing_team, creator=self.wing_user)
+            for _ in range(3)
+        ]
+        self.body_part = Part.objects.create(part_type='body', aircraft_type='TB2', team=self.body_team, creator=self.body_user)
+        call_command('rebuild_stock_levels', stdout=StringIO())
+        
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.wing_user)
+    
+    """Test deleting a part keeps the row and marks it recycled"""
+    def test_destroy_is_soft(self):
+        response = self.client.delete(reverse('part-detail', args=[self.parts[0].id]))
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        
+        self.parts[0].refresh_from_db()
+        self.assertTrue(self.parts[0].is_recycled)
+    
+    """Test the routed single recycle action"""
+    def test_recycle_part_action(self):
+        response = self.client.post(reverse('part-recycle', args=[self.parts[1].id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data['is_recycled'])
+        call_command('rebuild_stock_levels', '--verify', stdout=StringIO())
+    
+    """Test batch recycling reports every rejected id"""
+    def test_recycle_batch(self):
+        assembly = AssemblyProcess.objects.create(aircraft_type='TB2')
+        AssemblyPart.objects.create(assembly=assembly, part=self.parts[2])
+        call_command('rebuild_stock_levels', stdout=StringIO())
+        
+        part_ids = [self.parts[0].id, self.parts[1].id, self.parts[2].id, self.body_part.id]
+        response = self.client.post(reverse('part-recycle-batch'), {'part_ids': part_ids}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['recycled'], [self.parts[0].id, self.parts[1].id])
+        self.assertEqual(
+            [item['part_id'] for item in response.data['rejected']],
+            [self.parts[2].id, self.body_part.id]
+        )
+        
+        self.assertEqual(Part.objects.filter(is_recycled=True).count(), 2)
+        call_command('rebuild_stock_levels', '--verify', stdout=StringIO())
 
 
 class PermissionTests(TestCase):
@@ -241,3 +751,147 @@ class PermissionTests(TestCase):
         wing_request = MockRequest(self.wing_user)
         self.assertTrue(self.permission.has_object_permission(wing_request, MockView(), wing_part))
         self.assertFalse(self.permission.has_object_permission(wing_request, MockView(), body_part))
+
+
+class PartPaginationTests(APITestCase):
+    """Tests for the DataTables and keyset pagination modes of the part list"""
+    
+    def setUp(self):
+        self.wing_team = Team.objects.create(name='Wing Team', team_type='wing')
+        self.wing_user = User.objects.create_user(
+            username='wing_user',
+            email='wing@example.com',
+            password='password',
+            team=self.wing_team
+        )
+        
+        self.parts = [
+            Part.objects.create(
+                part_type='wing',
+                aircraft_type='TB2' if i % 2 else 'TB3',
+                team=self.wing_team,
+                creator=self.wing_user
+            )
+            for i in range(7)
+        ]
+        
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.wing_user)
+        self.parts_list_url = reverse('part-list')
+    
+    """Test DataTables requests get one page with record counts"""
+    def test_datatables_page(self):
+        response = self.client.get(self.parts_list_url, {'draw': 3, 'start': 2, 'length': 3})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['draw'], 3)
+        self.assertEqual(response.data['recordsTotal'], 7)
+        self.assertEqual(response.data['recordsFiltered'], 7)
+        self.assertEqual(len(response.data['data']), 3)
+    
+    """Test DataTables counts distinguish total and filtered rows"""
+    def test_datatables_filtered_counts(self):
+        response = self.client.get(self.parts_list_url, {
+            'draw': 1, 'start': 0, 'length': 10, 'aircraft_type': 'TB2'
+        })
+        self.assertEqual(response.data['recordsTotal'], 7)
+        self.assertEqual(response.data['recordsFiltered'], 3)
+        self.assertEqual(len(response.data['data']), 3)
+    
+    """Test keyset pagination walks every part exactly once"""
+    def test_keyset_pages(self):
+        seen = []
+        response = self.client.get(self.parts_list_url, {'page_size': 3})
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            seen.extend(item['id'] for item in response.data['results'])
+            if not response.data['next']:
+                break
+            response = self.client.get(response.data['next'])
+        
+        self.assertEqual(seen, sorted((part.id for part in self.parts), reverse=True))
+    
+    """Test an invalid cursor is rejected"""
+    def test_keyset_invalid_cursor(self):
+        response = self.client.get(self.parts_list_url, {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+    
+    """Test cursor pages reject an ordering they can't honour and accept their own"""
+    def test_keyset_rejects_other_ordering(self):
+        first = self.client.get(self.parts_list_url, {'page_size': 3})
+        cursor = parse_qs(urlparse(first.data['next']).query)['cursor'][0]
+        
+        response = self.client.get(self.parts_list_url, {'cursor': cursor, 'ordering': '-part_type'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('ordering', response.data)
+        response = self.client.get(self.parts_list_url, {'page_size': 3, 'ordering': 'id'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        
+        response = self.client.get(self.parts_list_url, {'cursor': cursor, 'ordering': '-created_at,-id'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        
+        # DataTables and plain lists still sort by any ordering field
+        response = self.client.get(self.parts_list_url, {'draw': 1, 'ordering': 'id'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class LockConflictTests(APITestCase):
+    """Tests for telling lock conflicts apart from other database errors"""
+    
+    def setUp(self):
+        self.assembly_team = Team.objects.create(name='Assembly Team', team_type='assembly')
+        self.wing_team = Team.objects.create(name='Wing Team', team_type='wing')
+        self.assembler = User.objects.create_user(username='assembler', password='password', team=self.assembly_team)
+        self.wing_part = Part.objects.create(part_type='wing', aircraft_type='TB2', team=self.wing_team, creator=self.assembler)
+        self.assembly = AssemblyProcess.objects.create(aircraft_type='TB2', started_by=self.assembler)
+        
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.assembler)
+    
+    def database_error(self, error_class, pgcode, table_name=None):
+        class DriverError(Exception):
+            def __init__(self):
+                self.pgcode = pgcode
+                self.diag = mock.Mock(table_name=table_name)
+        
+        try:
+            raise error_class() from DriverError()
+        except error_class as exc:
+            return exc
+    
+    """Test refused NOWAIT locks and lost part unique races are conflicts, other errors are not"""
+    def test_is_lock_conflict(self):
+        self.assertTrue(is_lock_conflict(self.database_error(OperationalError, LOCK_NOT_AVAILABLE)))
+        self.assertTrue(is_lock_conflict(self.database_error(IntegrityError, '23505', 'assembly_assemblypart')))
+        self.assertFalse(is_lock_conflict(self.database_error(IntegrityError, '23505', 'parts_stocklevel')))
+        self.assertFalse(is_lock_conflict(self.database_error(IntegrityError, '23502', 'assembly_assemblypart')))
+        self.assertFalse(is_lock_conflict(self.database_error(IntegrityError, '23503', 'assembly_assemblypart')))
+        self.assertFalse(is_lock_conflict(IntegrityError()))
+        self.assertFalse(is_lock_conflict(self.database_error(OperationalError, '08006')))
+        self.assertFalse(is_lock_conflict(ValueError()))
+    
+    def post_while_locked(self, url, data):
+        error = self.database_error(OperationalError, LOCK_NOT_AVAILABLE)
+        with mock.patch('django.db.models.query.QuerySet.select_for_update', side_effect=error):
+            return self.client.post(url, data, format='json')
+    
+    """Test the allocation endpoints answer a held row lock with 409"""
+    def test_views_return_conflict(self):
+        add_url = reverse('assembly-process-add-part', args=[self.assembly.id])
+        response = self.post_while_locked(add_url, {'part_id': self.wing_part.id})
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        
+        complete_url = reverse('assembly-process-complete-assembly', args=[self.assembly.id])
+        response = self.post_while_locked(complete_url, {})
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        
+        response = self.post_while_locked(reverse('assemble-aircraft'), {'aircraft_type': 'TB2', 'parts': [self.wing_part.id]})
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertFalse(AssemblyPart.objects.exists())
+    
+    """Test other integrity errors are not hidden as conflicts"""
+    def test_views_raise_other_errors(self):
+        error = self.database_error(IntegrityError, '23502', 'assembly_assemblypart')
+        add_url = reverse('assembly-process-add-part', args=[self.assembly.id])
+        with mock.patch('django.db.models.query.QuerySet.select_for_update', side_effect=error):
+            with self.assertRaises(IntegrityError):
+                self.client.post(add_url, {'part_id': self.wing_part.id}, format='json')
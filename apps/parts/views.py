@@ -1,27 +1,47 @@
 from django.shortcuts import render
 
 #custom
+import csv
+import io
+from collections import Counter
 from rest_framework import viewsets, status, filters
-from .models import Part, PART_TYPES
-from .serializers import PartSerializer
+from rest_framework.decorators import action
+from .models import Part, PART_TYPES, StockLevel
+from .serializers import PartSerializer, PartBulkRowSerializer, StockLevelSerializer, KitForecastQuerySerializer
+from .stock import forecast_kits, move_stock, move_stock_counts, part_state
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.exceptions import PermissionDenied
-from django.db.models import Q
+from django.db.models import Exists, OuterRef, Q
+from django.db import transaction
+from django.utils import timezone
 from django_filters.rest_framework import DjangoFilterBackend
 from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
+from django.http import StreamingHttpResponse
+from django.core.handlers.asgi import ASGIRequest
 from .permissions import CanManagePart
+from .pagination import PartPagination
+from .search import TrigramSearchFilter
+from .conditional import ConditionalGetMixin
+from .idempotency import idempotent
+from .exports import EXPORT_FORMATS, STREAMERS, export_rows, stream_async
+from .aging import aging_report, bucket_labels
 
 # Create your views here.
-class PartViewSet(viewsets.ModelViewSet):
+class PartViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     serializer_class = PartSerializer
     permission_classes = [IsAuthenticated, CanManagePart]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    pagination_class = PartPagination
+    filter_backends = [DjangoFilterBackend, TrigramSearchFilter, filters.OrderingFilter]
     filterset_fields = ['part_type', 'aircraft_type', 'is_recycled']
     search_fields = ['id', 'team__name', 'creator__username']
-    ordering_fields = ['created_at', 'part_type', 'aircraft_type']
-    ordering = ['-created_at']
+    ordering_fields = ['id', 'created_at', 'part_type', 'aircraft_type', 'creator__username']
+    ordering = ['-created_at', '-id']
+    bulk_max_rows = 5000
+    export_chunk_size = 2000
+    aging_default_oldest = 5
+    aging_max_oldest = 50
 
     """
     Filter parts based on user's team
@@ -29,18 +49,25 @@ class PartViewSet(viewsets.ModelViewSet):
     """
     def get_queryset(self):
         user = self.request.user
-        if not user.team:
+        if not user.team_id:
             return Part.objects.none()
-            
-        if user.team.team_type == 'assembly':
-            return Part.objects.all()
+        
+        # Usage annotation and joined team/creator keep the list at a fixed number of queries
+        queryset = Part.objects.with_usage().select_related('team', 'creator')
+        if user.team.is_assembly:
+            return queryset
         else:
-            return Part.objects.filter(team=user.team)
+            return queryset.filter(team_id=user.team_id)
+
+    """Part creation can be retried with an Idempotency-Key header without registering the part twice"""
+    @idempotent
+    def create(self, request, *args, **kwargs):
+        return super().create(request, *args, **kwargs)
 
     """Ensure teams can only create parts of their type"""
     def perform_create(self, serializer):
         user = self.request.user
-        if not user.team:
+        if not user.team_id:
             raise PermissionDenied("Bu kullanıcı bir takıma atanmamış.")
             
         part_type = self.request.data.get('part_type')
@@ -50,40 +77,285 @@ class PartViewSet(viewsets.ModelViewSet):
             raise PermissionDenied(f"Bu takım {dict(PART_TYPES).get(part_type)} üretemez.")
             
         # Set the team and creator automatically based on the user
-        serializer.save(team=user.team, creator=user)
+        with transaction.atomic():
+            part = serializer.save(team=user.team, creator=user)
+            move_stock([part], to_state='available')
+        
+    """
+    Register many parts in one request from a JSON array or a CSV upload (file field)
+    Good rows are inserted together, bad rows are reported back by their 1-based row number
+    """
+    @action(detail=False, methods=['post'], url_path='bulk')
+    @idempotent
+    def bulk_create(self, request):
+        user = request.user
+        
+        try:
+            rows = self.get_bulk_rows(request)
+        except (UnicodeDecodeError, csv.Error):
+            return Response({"error": "CSV dosyası okunamadı."}, status=status.HTTP_400_BAD_REQUEST)
+        
+        if rows is None:
+            return Response(
+                {"error": "Parça listesi (JSON dizisi) veya CSV dosyası gerekli."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        if len(rows) > self.bulk_max_rows:
+            return Response(
+                {"error": f"Tek seferde en fazla {self.bulk_max_rows} parça kaydedilebilir."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        # Team permission is checked once per part type, not once per row
+        allowed_types = {}
+        parts = []
+        errors = []
+        
+        for row_number, row in enumerate(rows, start=1):
+            serializer = PartBulkRowSerializer(data=row)
+            if not serializer.is_valid():
+                errors.append({"row": row_number, "errors": serializer.errors})
+                continue
+            
+            part_type = serializer.validated_data['part_type']
+            if part_type not in allowed_types:
+                allowed_types[part_type] = user.team.can_produce_part(part_type)
+            if not allowed_types[part_type]:
+                errors.append({
+                    "row": row_number,
+                    "error": f"Bu takım {dict(PART_TYPES).get(part_type)} üretemez."
+                })
+                continue
+            
+            parts.append(Part(team=user.team, creator=user, **serializer.validated_data))
+        
+        with transaction.atomic():
+            created = Part.objects.bulk_create(parts, batch_size=1000)
+            move_stock(created, to_state='available')
+        
+        return Response({
+            "created_count": len(created),
+            "created_ids": [part.id for part in created],
+            "errors": errors
+        }, status=status.HTTP_201_CREATED if created else status.HTTP_400_BAD_REQUEST)
+    
+    """Read bulk rows from an uploaded CSV file or from a JSON array body"""
+    def get_bulk_rows(self, request):
+        upload = request.FILES.get('file')
+        if upload is not None:
+            reader = csv.DictReader(io.TextIOWrapper(upload.file, encoding='utf-8-sig'))
+            return list(reader)
+        
+        data = request.data
+        if isinstance(data, dict):
+            data = data.get('parts')
+        if isinstance(data, list):
+            return data
+        return None
+        
+    """
+    Stream the filtered inventory as CSV (default) or NDJSON (?export_format=ndjson)
+    Supports the same filters, search and ordering as the list endpoint
+    """
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        export_format = request.query_params.get('export_format', 'csv')
+        if export_format not in EXPORT_FORMATS:
+            return Response(
+                {"error": f"Desteklenmeyen dışa aktarma biçimi: {export_format}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        queryset = self.filter_queryset(self.get_queryset())
+        rows = export_rows(queryset, chunk_size=self.export_chunk_size)
+        
+        lines = STREAMERS[export_format](rows)
+        if isinstance(request._request, ASGIRequest):
+            # ASGI would collect a sync iterator into memory first, hand it chunks asynchronously instead
+            lines = stream_async(lines, chunk_size=self.export_chunk_size)
+        
+        response = StreamingHttpResponse(lines, content_type=EXPORT_FORMATS[export_format])
+        response['Content-Disposition'] = f'attachment; filename="parts.{export_format}"'
+        return response
+    
+    """
+    Age histograms of the parts still on the shelf per aircraft type, part type and team,
+    with the oldest `oldest` parts of each group (default 5, at most 50)
+    """
+    @action(detail=False, methods=['get'])
+    def aging(self, request):
+        try:
+            oldest = int(request.query_params.get('oldest', self.aging_default_oldest))
+        except ValueError:
+            oldest = self.aging_default_oldest
+        oldest = min(max(oldest, 0), self.aging_max_oldest)
         
+        queryset = Part.objects.available()
+        if not request.user.team.is_assembly:
+            queryset = queryset.filter(team_id=request.user.team_id)
+        queryset = DjangoFilterBackend().filter_queryset(request, queryset, self)
+        
+        return Response({
+            "buckets": bucket_labels(),
+            "groups": aging_report(queryset, oldest=oldest),
+        })
+    
     """Prevent changing part's type to one the team can't produce"""
     def perform_update(self, serializer):
         user = self.request.user
         part = self.get_object()
         
         # Only the team that created the part can update it
-        if part.team != user.team and user.team.team_type != 'assembly':
+        if part.team_id != user.team_id and not user.team.is_assembly:
             raise PermissionDenied("Sadece parçayı üreten takım güncelleyebilir.")
             
         part_type = self.request.data.get('part_type')
         if part_type and part_type != part.part_type and not user.team.can_produce_part(part_type):
             raise PermissionDenied(f"Bu takım {dict(PART_TYPES).get(part_type)} üretemez.")
             
-        serializer.save()
+        with transaction.atomic():
+            before = part_state(part)
+            updated = serializer.save()
+            after = part_state(updated)
+            
+            # Type or state changes move the part between stock rows
+            if (part.aircraft_type, part.part_type, before) != (updated.aircraft_type, updated.part_type, after):
+                move_stock([part], from_state=before)
+                move_stock([updated], to_state=after)
         
     """Override to implement recycling instead of real deletion and check permissions"""
     def perform_destroy(self, instance):
         user = self.request.user
         
         # Only allow users from the same team as the part to recycle it
-        if instance.team != user.team and user.team.team_type != 'assembly':
+        if instance.team_id != user.team_id and not user.team.is_assembly:
             raise PermissionDenied("Sadece parçayı üreten takım geri dönüşüme gönderebilir.")
             
         # If part is in use (either in aircraft or assembly), it can't be recycled
-        if instance.used_in_aircraft:
+        if instance.used_in_aircraft_id:
             raise PermissionDenied("Uçakta kullanılan parçalar geri dönüşüme gönderilemez.")
         
         # Check if part is in an assembly
         if instance.is_in_assembly:
             raise PermissionDenied("Montajda kullanılan parçalar geri dönüşüme gönderilemez.")
+        
+        if instance.is_recycled:
+            return
             
-        instance.delete()
+        recycled, rejected = self.recycle_parts([instance.id])
+        if rejected:
+            # Picked up by an assembly between the checks above and the update
+            raise PermissionDenied("Montajda kullanılan parçalar geri dönüşüme gönderilemez.")
+    
+    """Recycle a single part, it stays in the table with is_recycled set"""
+    @action(detail=True, methods=['post'], url_path='recycle', url_name='recycle')
+    def recycle_part(self, request, pk=None):
+        part = self.get_object()
+        self.perform_destroy(part)
+        part.refresh_from_db()
+        return Response(self.get_serializer(part).data)
+    
+    """
+    Recycle many parts at once with one guarded UPDATE
+    Parts that are used, in an assembly, already recycled or not visible to the team are reported back
+    """
+    @action(detail=False, methods=['post'], url_path='recycle', url_name='recycle-batch')
+    def recycle_batch(self, request):
+        part_ids = request.data.get('part_ids')
+        if not isinstance(part_ids, list) or not part_ids:
+            return Response({"error": "part_ids listesi gerekli."}, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            part_ids = {int(part_id) for part_id in part_ids}
+        except (TypeError, ValueError):
+            return Response({"error": "part_ids yalnızca sayı içermelidir."}, status=status.HTTP_400_BAD_REQUEST)
+        
+        recycled, rejected = self.recycle_parts(part_ids)
+        
+        return Response({
+            "recycled": sorted(recycled),
+            "rejected": self.get_rejection_reasons(rejected)
+        }, status=status.HTTP_200_OK if recycled else status.HTTP_400_BAD_REQUEST)
+    
+    """
+    Flip is_recycled for every recyclable part in part_ids and move them in the stock ledger
+    Returns (recycled ids, rejected ids)
+    """
+    def recycle_parts(self, part_ids):
+        # Import here to avoid circular import
+        from apps.assembly.models import AssemblyPart
+        
+        in_assembly = Exists(AssemblyPart.objects.filter(part=OuterRef('pk')))
+        guard = Q(is_recycled=False, used_in_aircraft__isnull=True)
+        
+        with transaction.atomic():
+            # Lock the candidates so the ledger counts match what the UPDATE touches
+            candidates = list(
+                self.get_queryset().select_related(None)
+                .filter(guard, id__in=part_ids).exclude(in_assembly)
+                .select_for_update(of=('self',)).order_by('id')
+                .values_list('id', 'aircraft_type', 'part_type')
+            )
+            candidate_ids = [part_id for part_id, _, _ in candidates]
+            
+            updated = Part.objects.filter(guard, id__in=candidate_ids).exclude(in_assembly).update(
+                is_recycled=True,
+                updated_at=timezone.now()
+            )
+            if updated != len(candidate_ids):
+                recycled_ids = set(Part.objects.filter(id__in=candidate_ids, is_recycled=True).values_list('id', flat=True))
+            else:
+                recycled_ids = set(candidate_ids)
+            
+            move_stock_counts(
+                Counter((aircraft_type, part_type) for part_id, aircraft_type, part_type in candidates if part_id in recycled_ids),
+                'available',
+                'recycled'
+            )
+        
+        return recycled_ids, set(part_ids) - recycled_ids
+    
+    """Explain why each rejected part could not be recycled"""
+    def get_rejection_reasons(self, part_ids):
+        rows = {
+            row['id']: row
+            for row in self.get_queryset().select_related(None).filter(id__in=part_ids)
+            .values('id', 'is_recycled', 'used_in_aircraft_id', 'in_assembly')
+        }
+        
+        rejected = []
+        for part_id in sorted(part_ids):
+            row = rows.get(part_id)
+            if row is None:
+                reason = "Parça bulunamadı."
+            elif row['is_recycled']:
+                reason = "Parça zaten geri dönüşüme gönderilmiş."
+            elif row['used_in_aircraft_id']:
+                reason = "Uçakta kullanılan parçalar geri dönüşüme gönderilemez."
+            else:
+                reason = "Montajda kullanılan parçalar geri dönüşüme gönderilemez."
+            rejected.append({"part_id": part_id, "error": reason})
+        return rejected
+
+
+class StockLevelViewSet(viewsets.ReadOnlyModelViewSet):
+    """Inventory counts per aircraft type and part type, read from the stock ledger"""
+    serializer_class = StockLevelSerializer
+    permission_classes = [IsAuthenticated]
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = ['aircraft_type', 'part_type']
+    queryset = StockLevel.objects.order_by('aircraft_type', 'part_type')
+
+    """
+    Complete aircraft buildable from the parts on the shelf per aircraft type and the part types limiting it.
+    ?target=<n> adds how many parts each producing team is short of n aircraft
+    """
+    @action(detail=False, methods=['get'])
+    def forecast(self, request):
+        serializer = KitForecastQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        return Response(forecast_kits(**serializer.validated_data))
 
 """View for part management page"""
 @login_required
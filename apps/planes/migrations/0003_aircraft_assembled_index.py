@@ -0,0 +1,17 @@
+# Generated by Django 5.2 on 2026-10-18 04:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('planes', '0002_aircraft_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='aircraft',
+            index=models.Index(fields=['assembled_at', 'id'], name='aircraft_assembled_idx'),
+        ),
+    ]
@@ -11,7 +11,14 @@ AIRCRAFT_TYPES = (
 class Aircraft(models.Model):
     aircraft_type = models.CharField(max_length=50, choices=AIRCRAFT_TYPES)
     assembled_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     # You can add more fields if needed (e.g., production log)
 
+    class Meta:
+        indexes = [
+            # Completed aircraft list pages newest first on (assembled_at, id)
+            models.Index(fields=['assembled_at', 'id'], name='aircraft_assembled_idx'),
+        ]
+
     def __str__(self):
         return f"{self.aircraft_type} - {self.id}"
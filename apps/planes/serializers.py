@@ -0,0 +1,22 @@
+from rest_framework import serializers
+from apps.planes.models import AIRCRAFT_TYPES
+
+
+class AircraftSpecSerializer(serializers.Serializer):
+    """One finished airframe: its type and the ids of the parts it was built from"""
+    aircraft_type = serializers.ChoiceField(choices=AIRCRAFT_TYPES)
+    parts = serializers.ListField(child=serializers.IntegerField(min_value=1), allow_empty=False)
+
+
+class AircraftBatchSerializer(serializers.Serializer):
+    """Several airframes assembled in one request, accepted or rejected together"""
+    aircraft = AircraftSpecSerializer(many=True, allow_empty=False, max_length=100)
+
+    def validate_aircraft(self, specs):
+        seen = set()
+        for spec in specs:
+            duplicated = seen.intersection(spec['parts'])
+            if duplicated or len(set(spec['parts'])) != len(spec['parts']):
+                raise serializers.ValidationError("A part can only be used in one aircraft")
+            seen.update(spec['parts'])
+        return specs
@@ -7,6 +7,7 @@ from rest_framework.authentication import SessionAuthentication
 
 from apps.planes.models import Aircraft, AIRCRAFT_TYPES
 from apps.parts.models import Part
+from apps.parts.stock import rebuild_stock
 from apps.accounts.models import User, Team
 
 
@@ -240,3 +241,69 @@ class AssembleAircraftAPITests(APITestCase):
         # Try to use recycled part for aircraft
         # This should be detected and prevented
         self.assertTrue(self.tb2_wing.is_recycled, "Part is recycled and shouldn't be usable")
+    
+    """Test a single aircraft is assembled through the API and its parts leave the shelf"""
+    def test_assemble_aircraft_api(self):
+        data = {
+            'aircraft_type': 'TB2',
+            'parts': [self.tb2_wing.id, self.tb2_body.id, self.tb2_tail.id, self.tb2_avionics.id]
+        }
+        response = self.client.post(self.assemble_url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        
+        aircraft = Aircraft.objects.get(pk=response.data['aircraft_id'])
+        self.assertEqual(aircraft.part_set.count(), 4)
+        
+        # The same parts can't build a second aircraft
+        response = self.client.post(self.assemble_url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['error'], "Part already used or recycled")
+    
+    """Test single mode validation errors keep the {"error": ...} body"""
+    def test_assemble_aircraft_single_validation_error(self):
+        data = {'aircraft_type': 'TB2', 'parts': [self.tb2_wing.id, self.tb2_wing.id]}
+        response = self.client.post(self.assemble_url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data, {"error": "A part can only be used in one aircraft"})
+        
+        response = self.client.post(self.assemble_url, {'aircraft_type': 'XX', 'parts': [self.tb2_wing.id]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('aircraft_type', response.data)
+        self.assertFalse(Aircraft.objects.exists())
+    
+    """Test a batch is created with a fixed number of queries and rejected as a whole when one spec is wrong"""
+    def test_assemble_aircraft_batch(self):
+        specs = [{
+            'aircraft_type': 'TB2',
+            'parts': [self.tb2_wing.id, self.tb2_body.id, self.tb2_tail.id, self.tb2_avionics.id]
+        }]
+        for _ in range(2):
+            parts = [
+                Part.objects.create(part_type=part_type, aircraft_type='TB3', team=self.wing_team, creator=self.assembler)
+                for part_type in ('wing', 'body', 'tail', 'avionics')
+            ]
+            specs.append({'aircraft_type': 'TB3', 'parts': [part.id for part in parts]})
+        
+        # The TB3 wing doesn't belong in a TB2
+        bad_spec = {'aircraft_type': 'TB2', 'parts': [self.tb3_wing.id]}
+        response = self.client.post(self.assemble_url, {'aircraft': specs + [bad_spec]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['errors'][0]['index'], 3)
+        self.assertFalse(Aircraft.objects.exists())
+        
+        response = self.client.post(
+            self.assemble_url, {'aircraft': [specs[0], {'aircraft_type': 'TB3', 'parts': [self.tb2_wing.id]}]}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        
+        # Lock, insert and link are one query each, the ledger takes one per (aircraft type, part type)
+        rebuild_stock()
+        with self.assertNumQueries(13):
+            response = self.client.post(self.assemble_url, {'aircraft': specs}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data['aircraft_ids']), 3)
+        for spec, aircraft_id in zip(specs, response.data['aircraft_ids']):
+            self.assertEqual(
+                sorted(Part.objects.filter(used_in_aircraft_id=aircraft_id).values_list('id', flat=True)),
+                sorted(spec['parts'])
+            )
@@ -1,41 +1,107 @@
 from django.shortcuts import render
 
 #custom
+from collections import defaultdict
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from apps.planes.models import Aircraft
-from apps.parts.models import Part
-from django.db import transaction
+from apps.planes.serializers import AircraftBatchSerializer
+from apps.parts.models import Part, PART_TYPES
+from apps.parts.stock import move_stock
+from apps.parts.locking import conflict_response, is_lock_conflict
+from apps.parts.idempotency import idempotent
+from apps.assembly.events import publish_inventory_event
+from apps.assembly.views import IsAssemblyTeamMember
+from django.db import DatabaseError, transaction
+from django.db.models import Case, When
+from django.utils import timezone
 
 # Create your views here.
 class AssembleAircraftView(APIView):
+    """
+    Register finished airframes built outside the assembly process flow.
+    Accepts one aircraft ({aircraft_type, parts}) or a batch ({aircraft: [{aircraft_type, parts}, ...]}),
+    a batch is validated as a whole and either every aircraft is created or none
+    """
+    permission_classes = [IsAssemblyTeamMember]
+
+    @idempotent
     def post(self, request, *args, **kwargs):
-        aircraft_type = request.data.get('aircraft_type')
-        part_ids = request.data.get('parts', [])  # Expected list of part IDs
-        
-        # Expected mapping: { 'wing': <id>, 'body': <id>, 'tail': <id>, 'avionics': <id> }
-        required_parts = {
-            'wing': None,
-            'body': None,
-            'tail': None,
-            'avionics': None,
-        }
-
-        with transaction.atomic():
-            for part in Part.objects.filter(id__in=part_ids):
-                if part.is_recycled or part.used_in_aircraft:
-                    return Response({"error": "Part already used or recycled"}, status=status.HTTP_400_BAD_REQUEST)
-                required_parts[part.part_type] = part
-
-            if None in required_parts.values():
-                return Response({"error": "Missing required parts"}, status=status.HTTP_400_BAD_REQUEST)
-
-            # Create the aircraft
-            aircraft = Aircraft.objects.create(aircraft_type=aircraft_type)
-            # Link parts to the new aircraft
-            for part in required_parts.values():
-                part.used_in_aircraft = aircraft
-                part.save()
-            
-            return Response({"message": "Aircraft assembled", "aircraft_id": aircraft.id}, status=status.HTTP_201_CREATED)
+        batch = 'aircraft' in request.data
+        serializer = AircraftBatchSerializer(data=request.data if batch else {'aircraft': [request.data]})
+        if not serializer.is_valid():
+            errors = serializer.errors
+            if not batch:
+                # Field errors of the one aircraft, a batch level message keeps the single mode {"error": ...} shape
+                errors = errors['aircraft'][0]
+                if not isinstance(errors, dict):
+                    errors = {"error": errors}
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+        specs = serializer.validated_data['aircraft']
+
+        try:
+            with transaction.atomic():
+                # Lock every part in one query and in id order, a part held by another request is a conflict, not a wait
+                part_ids = [part_id for spec in specs for part_id in spec['parts']]
+                parts = {
+                    part.pk: part
+                    for part in Part.objects.with_usage().select_for_update(nowait=True).filter(id__in=part_ids).order_by('pk')
+                }
+
+                errors = []
+                for index, spec in enumerate(specs):
+                    error = self.get_spec_error(spec, parts)
+                    if error:
+                        errors.append({"index": index, "error": error})
+                if errors:
+                    if not batch:
+                        return Response({"error": errors[0]['error']}, status=status.HTTP_400_BAD_REQUEST)
+                    return Response({"errors": errors}, status=status.HTTP_400_BAD_REQUEST)
+
+                aircraft = Aircraft.objects.bulk_create([Aircraft(aircraft_type=spec['aircraft_type']) for spec in specs])
+
+                # Link every part to its aircraft with a single UPDATE, one WHEN per aircraft
+                Part.objects.filter(pk__in=part_ids).update(
+                    used_in_aircraft=Case(*[
+                        When(pk__in=spec['parts'], then=plane.pk) for spec, plane in zip(specs, aircraft)
+                    ]),
+                    updated_at=timezone.now(),
+                )
+                move_stock(parts.values(), 'available', 'used')
+
+                by_type = defaultdict(list)
+                for part in parts.values():
+                    by_type[part.aircraft_type].append(part)
+                for aircraft_type, type_parts in by_type.items():
+                    publish_inventory_event('parts_reserved', aircraft_type, type_parts)
+        except DatabaseError as exc:
+            if not is_lock_conflict(exc):
+                raise
+            return conflict_response()
+
+        if not batch:
+            return Response({"message": "Aircraft assembled", "aircraft_id": aircraft[0].id}, status=status.HTTP_201_CREATED)
+        return Response({
+            "message": f"{len(aircraft)} aircraft assembled",
+            "aircraft_ids": [plane.id for plane in aircraft]
+        }, status=status.HTTP_201_CREATED)
+
+    """Why the parts of one spec can't build the aircraft, None when they can"""
+    def get_spec_error(self, spec, parts):
+        found = {}
+        for part_id in spec['parts']:
+            part = parts.get(part_id)
+            if part is None:
+                return f"Part {part_id} does not exist"
+            if part.is_recycled or part.used_in_aircraft_id or part.in_assembly:
+                return "Part already used or recycled"
+            if part.aircraft_type != spec['aircraft_type']:
+                return f"Part {part_id} is not a {spec['aircraft_type']} part"
+            if part.part_type in found:
+                return f"More than one {part.get_part_type_display()} part"
+            found[part.part_type] = part
+
+        if len(found) != len(PART_TYPES):
+            return "Missing required parts"
+        return None
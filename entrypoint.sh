@@ -7,13 +7,10 @@ while ! nc -z $POSTGRES_HOST $POSTGRES_PORT; do
 done
 echo "PostgreSQL started"
 
-# Make migrations for any model changes
-echo "Making migrations for model changes..."
-python manage.py makemigrations
-
 # Apply database migrations
 echo "Applying database migrations..."
 python manage.py migrate
+python manage.py createcachetable
 
 # Create default superuser if it doesn't exist
 echo "Creating default superuser..."
@@ -53,4 +50,5 @@ python manage.py collectstatic --noinput
 
 # Start server
 echo "Starting server..."
-exec gunicorn --bind 0.0.0.0:8000 aircraft_production.wsgi 
\ No newline at end of file
+# ASGI workers keep the assembly event streams open without tying up a worker per browser
+exec gunicorn --bind 0.0.0.0:8000 -k uvicorn_worker.UvicornWorker aircraft_production.asgi:application 
\ No newline at end of file
@@ -14,6 +14,12 @@ $(document).ready(function() {
     // Get available parts for this aircraft type
     loadAvailableParts();
     
+    // Load the newest page of the assembly history
+    loadAssemblyLogs();
+    
+    // Apply other assemblers' changes as they happen
+    subscribeToEvents();
+    
     /**
      * Load available parts from the API
      */
@@ -71,31 +77,59 @@ $(document).ready(function() {
             `);
             
             const container = typeSection.find(`#part-type-${partType}`);
+            appendPartCards(container, partType, typeData);
             
-            // Add each part to its section
-            typeData.parts.forEach(part => {
-                const partCard = $(`
-                    <div class="part-card" data-part-id="${part.id}" data-part-type="${partType}">
-                        <div class="d-flex justify-content-between align-items-center">
-                            <span>
-                                <span class="badge bg-secondary">#${part.id}</span>
-                                ${typeData.name}
-                            </span>
-                            <span class="text-muted small">${part.created_at}</span>
-                        </div>
-                        <small class="text-muted d-block mt-1">Üretici: ${part.team} (${part.creator})</small>
+            partsPanel.append(typeSection);
+        });
+    }
+    
+    /**
+     * Add part cards of one type, with a "load more" button when the API has another page
+     */
+    function appendPartCards(container, partType, typeData) {
+        typeData.parts.forEach(part => {
+            const partCard = $(`
+                <div class="part-card" data-part-id="${part.id}" data-part-type="${partType}">
+                    <div class="d-flex justify-content-between align-items-center">
+                        <span>
+                            <span class="badge bg-secondary">#${part.id}</span>
+                            ${typeData.name}
+                        </span>
+                        <span class="text-muted small">${part.created_at}</span>
                     </div>
-                `);
-                
-                partCard.on('click', function() {
-                    selectPart($(this));
-                });
-                
-                container.append(partCard);
+                    <small class="text-muted d-block mt-1">Üretici: ${part.team} (${part.creator})</small>
+                </div>
+            `);
+            
+            partCard.on('click', function() {
+                selectPart($(this));
             });
             
-            partsPanel.append(typeSection);
+            container.append(partCard);
         });
+        
+        if (!typeData.next) {
+            return;
+        }
+        
+        const moreButton = $('<button class="btn btn-sm btn-outline-secondary w-100 mt-2">Daha Fazla Göster</button>');
+        moreButton.on('click', function() {
+            moreButton.prop('disabled', true);
+            $.ajax({
+                url: `/assembly/api/available-parts/${aircraftType}/`,
+                type: 'GET',
+                data: { part_type: partType, cursor: typeData.next },
+                success: function(response) {
+                    moreButton.remove();
+                    appendPartCards(container, partType, response[partType]);
+                },
+                error: function() {
+                    moreButton.prop('disabled', false);
+                    toastr.error('Parçalar yüklenirken hata oluştu.');
+                }
+            });
+        });
+        container.append(moreButton);
     }
     
     /**
@@ -178,19 +212,9 @@ $(document).ready(function() {
                 if (response.added_parts && response.added_parts.length > 0) {
                     toastr.success(`${response.added_parts.length} parça başarıyla eklendi.`);
                     
-                    // Remove the added parts from the UI
-                    selectedPartCards.forEach(partCard => {
-                        const partTypeContainer = partCard.closest('.part-type-container');
-                        partCard.remove();
-                        
-                        if (partTypeContainer.children().length === 0) {
-                            // If no more parts of this type, remove the entire section
-                            partTypeContainer.closest('.part-type-section').remove();
-                        }
-                    });
-                    
-                    // Use the refresh function instead of immediate reload
-                    refreshView();
+                    // Apply the change in place, the same delta reaches other open pages as an event
+                    applyPartsAdded(response.added_parts.map(assemblyPart => assemblyPart.part));
+                    loadAssemblyLogs();
                 }
                 
                 // Display any errors
@@ -290,16 +314,87 @@ $(document).ready(function() {
     }
     
     /**
-     * Refresh the page after a short delay to reflect changes
+     * Listen to the assembly event stream and apply each change as a small delta
+     */
+    function subscribeToEvents() {
+        if (!window.EventSource) {
+            return;
+        }
+        
+        const events = new EventSource(`/assembly/api/events/?assembly=${assemblyId}`);
+        const parse = event => JSON.parse(event.data);
+        
+        events.addEventListener('parts_added', function(event) {
+            applyPartsAdded(parse(event).parts);
+            loadAssemblyLogs();
+        });
+        
+        events.addEventListener('part_removed', function(event) {
+            const part = parse(event).part;
+            $(`.aircraft-part.part-${part.part_type}`).removeClass('filled').empty();
+            updateMissingFromSkeleton();
+            loadAssemblyLogs();
+        });
+        
+        events.addEventListener('completed', function() {
+            updateSkeletonDisplay();
+            loadAssemblyLogs();
+        });
+        
+        events.addEventListener('cancelled', function() {
+            updateSkeletonDisplay();
+            loadAssemblyLogs();
+        });
+        
+        // Parts taken by any assembly leave the picker, released parts need a fresh list
+        events.addEventListener('parts_reserved', function(event) {
+            const data = parse(event);
+            if (data.aircraft_type === aircraftType) {
+                data.part_ids.forEach(removePartCard);
+            }
+        });
+        
+        events.addEventListener('parts_released', function(event) {
+            if (parse(event).aircraft_type === aircraftType) {
+                loadAvailableParts();
+            }
+        });
+    }
+    
+    /**
+     * Fill the skeleton with newly added parts and take them off the picker
      */
-    function refreshView() {
-        // Show a loading message
-        toastr.info('Değişiklikler yükleniyor...');
-        
-        // Refresh the page after a short delay
-        setTimeout(function() {
-            location.reload();
-        }, 1000);
+    function applyPartsAdded(parts) {
+        parts.forEach(part => {
+            $(`.aircraft-part.part-${part.part_type}`).addClass('filled').html(`<span>${part.part_type_display}</span>`);
+            removePartCard(part.id);
+        });
+        updateMissingFromSkeleton();
+    }
+    
+    /**
+     * Remove a part card from the picker, and its section when it was the last one
+     */
+    function removePartCard(partId) {
+        const partCard = $(`.part-card[data-part-id="${partId}"]`);
+        const partTypeContainer = partCard.closest('.part-type-container');
+        partCard.remove();
+        
+        if (partTypeContainer.length && partTypeContainer.children('.part-card').length === 0) {
+            partTypeContainer.closest('.part-type-section').remove();
+        }
+    }
+    
+    /**
+     * Recompute the missing parts warning from the skeleton without asking the server
+     */
+    function updateMissingFromSkeleton() {
+        const missing = $('.aircraft-part').not('.filled').map(function() {
+            return $(this).data('part-type');
+        }).get();
+        
+        $('#missing-parts-warning').toggleClass('d-none', missing.length === 0);
+        checkCompletionEligibility(missing);
     }
     
     /**
@@ -482,61 +577,41 @@ $(document).ready(function() {
     });
     
     /**
-     * Update the assembly logs display
+     * Load one page of the assembly history and append it to the log card
      */
-    function updateAssemblyLogs(logs) {
-        const logsContainer = $('.list-group-flush');
-        logsContainer.empty();
-        
-        if (logs && logs.length > 0) {
-            // Pagination configuration
-            const logsPerPage = 5;
-            const totalPages = Math.ceil(logs.length / logsPerPage);
-            let currentPage = 1;
-            
-            // Function to display logs for current page
-            const displayLogsForPage = (page) => {
-                logsContainer.empty();
-                const startIndex = (page - 1) * logsPerPage;
-                const endIndex = Math.min(startIndex + logsPerPage, logs.length);
+    function loadAssemblyLogs(cursor) {
+        const logsContainer = $('#assembly-logs');
+        const moreButton = $('#more-logs-btn');
+        
+        $.ajax({
+            url: `/assembly/api/processes/${assemblyId}/logs/`,
+            type: 'GET',
+            data: cursor ? { cursor: cursor } : {},
+            success: function(response) {
+                if (!cursor) {
+                    logsContainer.empty();
+                }
                 
-                // Display logs for current page
-                for (let i = startIndex; i < endIndex; i++) {
-                    const log = logs[i];
-                    
-                    // Format timestamp if it's in ISO format
-                    let timestamp = log.timestamp;
-                    if (typeof timestamp === 'string' && timestamp.includes('T')) {
-                        const date = new Date(timestamp);
-                        timestamp = formatDate(date);
-                    }
+                if (!cursor && response.results.length === 0) {
+                    logsContainer.append('<div class="list-group-item text-center">Henüz işlem kaydı yok.</div>');
+                }
+                
+                response.results.forEach(log => {
+                    const timestamp = formatDate(new Date(log.timestamp));
                     
                     // Prepare part information if it exists
                     let partInfo = '';
-                    if (log.part && log.part.part_type_display) {
-                        partInfo = `<div><strong>Parça:</strong> ${log.part.part_type_display} (#${log.part.id})</div>`;
+                    if (log.part) {
+                        partInfo = `<div>Parça: ${log.part.part_type_display} (#${log.part.id})</div>`;
                     }
                     
                     // Prepare notes if they exist
                     let notesInfo = '';
                     if (log.notes) {
-                        // Translate English part names in notes to Turkish
-                        let translatedNotes = log.notes;
-                        translatedNotes = translatedNotes.replace('Added Wing part', 'Kanat parçası eklendi');
-                        translatedNotes = translatedNotes.replace('Added Body part', 'Gövde parçası eklendi');
-                        translatedNotes = translatedNotes.replace('Added Tail part', 'Kuyruk parçası eklendi');
-                        translatedNotes = translatedNotes.replace('Added Avionics part', 'Aviyonik parçası eklendi');
-                        
-                        notesInfo = `<div class="text-muted mt-1">${translatedNotes}</div>`;
-                    }
-                    
-                    // Get username safely
-                    let username = 'Bilinmeyen Kullanıcı';
-                    if (log.action_by && log.action_by.username) {
-                        username = log.action_by.username;
+                        notesInfo = `<div class="text-muted mt-1">${log.notes}</div>`;
                     }
                     
-                    const logItem = $(`
+                    logsContainer.append(`
                         <div class="list-group-item">
                             <div class="d-flex justify-content-between align-items-center">
                                 <strong>${log.action_display}</strong>
@@ -544,57 +619,28 @@ $(document).ready(function() {
                             </div>
                             ${partInfo}
                             ${notesInfo}
-                            <small><strong>İşlemi Yapan:</strong> ${username}</small>
+                            <small>İşlemi Yapan: ${log.action_by.username}</small>
                         </div>
                     `);
-                    logsContainer.append(logItem);
-                }
+                });
                 
-                // Add pagination controls if needed
-                if (totalPages > 1) {
-                    const paginationControls = $(`
-                        <div class="pagination-container mt-3 d-flex justify-content-between align-items-center">
-                            <div>
-                                <small class="text-muted">Sayfa ${page}/${totalPages} (Toplam ${logs.length} kayıt)</small>
-                            </div>
-                            <div class="btn-group" role="group">
-                                <button class="btn btn-sm btn-outline-secondary" id="prev-page" ${page === 1 ? 'disabled' : ''}>
-                                    <i class="bi bi-chevron-left"></i> Önceki
-                                </button>
-                                <button class="btn btn-sm btn-outline-secondary" id="next-page" ${page === totalPages ? 'disabled' : ''}>
-                                    Sonraki <i class="bi bi-chevron-right"></i>
-                                </button>
-                            </div>
-                        </div>
-                    `);
-                    
-                    logsContainer.append(paginationControls);
-                    
-                    // Add event listeners for pagination buttons
-                    $('#prev-page').on('click', function() {
-                        if (currentPage > 1) {
-                            currentPage--;
-                            displayLogsForPage(currentPage);
-                        }
-                    });
-                    
-                    $('#next-page').on('click', function() {
-                        if (currentPage < totalPages) {
-                            currentPage++;
-                            displayLogsForPage(currentPage);
-                        }
-                    });
-                }
-            };
-            
-            // Initial display
-            displayLogsForPage(currentPage);
-            
-        } else {
-            logsContainer.append('<div class="list-group-item text-center">Henüz işlem kaydı yok.</div>');
-        }
+                // The next page is addressed by the cursor inside the "next" link
+                const next = response.next ? new URL(response.next).searchParams.get('cursor') : null;
+                moreButton.toggleClass('d-none', !next).data('cursor', next).prop('disabled', false);
+            },
+            error: function(error) {
+                moreButton.prop('disabled', false);
+                toastr.error('İşlem kayıtları yüklenirken hata oluştu.');
+                console.error('Error loading logs:', error);
+            }
+        });
     }
     
+    $('#more-logs-btn').on('click', function() {
+        $(this).prop('disabled', true);
+        loadAssemblyLogs($(this).data('cursor'));
+    });
+    
     /**
      * Update the header information with latest user and date details
      */